@@ -1,6 +1,15 @@
 from fastapi import FastAPI
+import asyncio
+import os
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.routes import router
+from src.services.llm_clients import close_clients
+from src.services.response_cache import response_cache
+from src.utils.pools import enable_process_pool, shutdown_pools
+from src.workers.async_worker import run_worker
+
+# Job workers run inside the API process; set to 0 when running job_worker.py separately
+EMBEDDED_JOB_WORKERS = int(os.getenv("EMBEDDED_JOB_WORKERS", "2"))
 
 app = FastAPI(title="Questionnaire Agent API")
 
@@ -14,6 +23,25 @@ app.add_middleware(
 
 app.include_router(router)
 
+_worker_tasks = []
+
+@app.on_event("startup")
+async def startup() -> None:
+    enable_process_pool()
+    for _ in range(EMBEDDED_JOB_WORKERS):
+        _worker_tasks.append(asyncio.create_task(run_worker()))
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    # Stop the job workers (unfinished jobs are picked up again after their lease expires),
+    # close pooled provider connections, write pending response cache updates and stop the indexing processes
+    for task in _worker_tasks:
+        task.cancel()
+    await close_clients()
+    if response_cache is not None:
+        response_cache.flush()
+    shutdown_pools()
+
 @app.get("/health")
 def health_check() -> dict:
     return {"status": "ok"}
@@ -23,7 +23,7 @@ def main():
         text_content = indexer.extract_text_from_pdf(file_path)
         doc = Document(id=pdf_file, filename=pdf_file, content=text_content, chunks=[])
         indexer.index_document(doc)
-        print(f"✓ Indexed {pdf_file}: {len(text_content)} chars, {len(doc.chunks)} chunks")
+        print(f"✓ Indexed {pdf_file}: {len(text_content)} chars, {doc.chunks_indexed} chunks")
     else:
         print(f"✗ File not found: {pdf_file}")
         return
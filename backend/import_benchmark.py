@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Import-time benchmark for the API, to keep worker start-up cheap
+
+Run: python import_benchmark.py [--runs N] [--budget-ms MS]
+Imports app.py in fresh interpreters and reports the median wall time and
+peak RSS. Fails (exit 1) if a heavy parsing or vector library is loaded at
+import time, or if the median exceeds the budget. Those libraries are meant
+to load on first use (see src/indexing/extraction.py and src/utils/lazy.py).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Must not be loaded by `import app`
+HEAVY_MODULES = [
+    "faiss", "numpy", "langchain_core", "langchain_community", "langchain_text_splitters",
+    "pypdf", "pymupdf", "fitz", "docx", "openpyxl", "pptx"
+]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+# Lazily imported modules sit in sys.modules as placeholders until first use
+loaded = [name for name in %r if name in sys.modules and type(sys.modules[name]).__name__ == "module"]
+print(json.dumps({"ms": elapsed * 1000, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "loaded": loaded}))
+""" % HEAVY_MODULES
+
+def measure() -> dict:
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=backend_dir, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long `import app` takes")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    median_ms = statistics.median(result["ms"] for result in results)
+    print(f"import app: median {median_ms:.0f} ms over {args.runs} runs, peak RSS {max(r['rss_mb'] for r in results):.0f} MB")
+
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    failed = False
+    if loaded:
+        print(f"FAIL: loaded at import time: {', '.join(loaded)}")
+        failed = True
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"FAIL: median import time {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Standalone job workers that pull from the durable SQLite job queue
+
+Run: python job_worker.py [--processes N]
+Each process leases one job at a time from JOB_QUEUE_PATH. Run the API with
+EMBEDDED_JOB_WORKERS=0 to leave all jobs to these processes; API and worker
+counts can then be scaled independently.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+from src.utils.pools import enable_process_pool
+from src.workers.async_worker import run_worker
+
+def main_worker():
+    enable_process_pool()
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run job queue workers")
+    parser.add_argument("--processes", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    
+    if args.processes == 1:
+        main_worker()
+    else:
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=main_worker) for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.join()
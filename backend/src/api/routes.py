@@ -1,20 +1,26 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
 from fastapi.responses import StreamingResponse
-from ..models import CreateProjectRequest, GenerateAnswerRequest, UpdateAnswerRequest, EvaluateProjectRequest, RequestStatus
+from ..models import CreateProjectRequest, GenerateAnswerRequest, UpdateAnswerRequest, EvaluateProjectRequest, Project, RequestStatus
 from ..services.project_service import create_project, get_project, update_project_status
 from ..services.answer_service import generate_answer, stream_answers
-from ..workers.async_worker import start_async_task, process_request_async
+from ..workers.async_worker import start_async_task
+from ..workers.job_queue import job_queue
+from ..workers.pipeline import stream_pipeline
 from ..storage.memory import storage
+from ..utils.uploads import get_data_dir, save_upload
 import json
+import os
+import uuid
+from typing import Optional
 
 router = APIRouter()
 
 @router.get("/test-ai")
-def test_ai():
+def test_ai(bypass_cache: bool = False):
     """Test the AI provider connection"""
     from ..services.answer_service import generate_answer
     try:
-        answer = generate_answer("test_project", "What is the capital of France?")
+        answer = generate_answer("test_project", "What is the capital of France?", use_cache=not bypass_cache)
         return {"status": "success", "answer": answer.answer_text[:200]}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -22,7 +28,7 @@ def test_ai():
 @router.get("/requests/{request_id}/status")
 def get_request_status_user_friendly(request_id: str):
     """Get user-friendly status with progress information and time estimates"""
-    request = storage.get_request(request_id)
+    request = job_queue.get_request(request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
     
@@ -106,15 +112,31 @@ def create_project_sync(req: CreateProjectRequest):
     return {"project_id": project.id}
 
 @router.post("/create-project-async")
-def create_project_async(req: CreateProjectRequest, background_tasks: BackgroundTasks):
+def create_project_async(req: CreateProjectRequest):
     request_id = start_async_task("create_project", {
         "name": req.name,
         "questionnaire_file": req.questionnaire_file,
         "scope": req.scope
     })
-    background_tasks.add_task(process_request_async, request_id)
     return {"request_id": request_id}
 
+@router.post("/create-project-pipeline")
+def create_project_pipeline(req: CreateProjectRequest, bypass_cache: bool = False):
+    """Create a project, index documents and answer questions in one job, answering while indexing runs"""
+    project_id = str(uuid.uuid4())
+    request_id = start_async_task("project_pipeline", {
+        "name": req.name,
+        "questionnaire_file": req.questionnaire_file,
+        "scope": req.scope,
+        "project_id": project_id,
+        "use_cache": not bypass_cache
+    })
+    return {
+        "request_id": request_id,
+        "project_id": project_id,
+        "stream_url": f"/stream-answers/{project_id}?request_id={request_id}"
+    }
+
 @router.post("/create-project-with-upload")
 def create_project_with_upload(
     name: str = Form(...),
@@ -122,20 +144,11 @@ def create_project_with_upload(
     questionnaire_file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None
 ):
-    # Save uploaded questionnaire file
-    import os
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    backend_dir = os.path.dirname(os.path.dirname(current_dir))
-    project_root = os.path.dirname(backend_dir)
-    data_dir = os.path.join(project_root, 'data')
-    
-    # Save the uploaded file
-    file_path = os.path.join(data_dir, questionnaire_file.filename)
-    with open(file_path, "wb") as buffer:
-        buffer.write(questionnaire_file.file.read())
+    # Stream the uploaded questionnaire file to the data directory
+    file_path, _, _ = save_upload(questionnaire_file.file, questionnaire_file.filename)
     
     # Create project with the uploaded file
-    project = create_project(name, questionnaire_file.filename, scope)
+    project = create_project(name, os.path.basename(file_path), scope)
     return {"project_id": project.id}
 
 @router.post("/create-project-with-upload")
@@ -145,20 +158,11 @@ def create_project_with_upload(
     background_tasks: BackgroundTasks = None,
     questionnaire_file: UploadFile = File(...)
 ):
-    # Save uploaded questionnaire file
-    import os
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    backend_dir = os.path.dirname(os.path.dirname(current_dir))
-    project_root = os.path.dirname(backend_dir)
-    data_dir = os.path.join(project_root, 'data')
-    
-    # Save the uploaded file
-    file_path = os.path.join(data_dir, questionnaire_file.filename)
-    with open(file_path, "wb") as buffer:
-        buffer.write(questionnaire_file.file.read())
+    # Stream the uploaded questionnaire file to the data directory
+    file_path, _, _ = save_upload(questionnaire_file.file, questionnaire_file.filename)
     
     # Create project synchronously for now (to debug)
-    project = create_project(name, questionnaire_file.filename, scope)
+    project = create_project(name, os.path.basename(file_path), scope)
     return {"project_id": project.id}
 
 @router.post("/generate-single-answer")
@@ -167,39 +171,40 @@ def generate_single_answer(req: GenerateAnswerRequest):
     return answer
 
 @router.post("/generate-all-answers")
-def generate_all_answers(project_id: str, background_tasks: BackgroundTasks):
-    request_id = start_async_task("generate_all_answers", {"project_id": project_id})
-    background_tasks.add_task(process_request_async, request_id)
+def generate_all_answers(project_id: str, bypass_cache: bool = False):
+    request_id = start_async_task("generate_all_answers", {"project_id": project_id, "use_cache": not bypass_cache})
     return {
         "request_id": request_id,
-        "message": "🚀 AI analysis started! Processing questions in optimized batches for faster results.",
+        "message": "🚀 AI analysis started! Processing questions concurrently for faster results.",
         "estimated_duration": "1-3 minutes for 37 questions (parallel processing)",
-        "what_happens_next": "Track progress at GET /requests/{request_id}/status. Questions are processed in batches of 3 concurrently.",
+        "what_happens_next": "Track progress at GET /requests/{request_id}/status. A new question starts as soon as any in-flight question finishes.",
         "performance_tips": "This is normal for AI-powered analysis. Each question requires document search + AI reasoning."
     }
 
 @router.post("/update-project-async")
-def update_project_async(project_id: str, background_tasks: BackgroundTasks):
+def update_project_async(project_id: str):
     request_id = start_async_task("update_project", {"project_id": project_id})
-    background_tasks.add_task(process_request_async, request_id)
     return {"request_id": request_id}
 
 @router.post("/update-answer")
 def update_answer(req: UpdateAnswerRequest):
-    project = storage.get_project(req.project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    updated = []
     
     # Find and update the answer
-    for answer in project.answers:
-        if answer.id == req.answer_id:
-            answer.status = req.status
-            if req.manual_answer:
-                answer.manual_answer = req.manual_answer
-            storage.save_project(project)
-            return {"message": "Answer updated"}
+    def update(project: Project):
+        for answer in project.answers:
+            if answer.id == req.answer_id:
+                answer.status = req.status
+                if req.manual_answer:
+                    answer.manual_answer = req.manual_answer
+                updated.append(answer.id)
+                return
     
-    raise HTTPException(status_code=404, detail="Answer not found")
+    if not storage.update_project(req.project_id, update):
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Answer not found")
+    return {"message": "Answer updated"}
 
 @router.get("/get-project-info")
 def get_project_info(project_id: str):
@@ -214,13 +219,27 @@ def get_project_info(project_id: str):
         if doc:
             documents_with_details.append({
                 "id": doc.id,
-                "filename": doc.filename
+                "filename": doc.filename,
+                # Indexing progress; INDEXING documents are already searchable up to pages_indexed
+                "status": doc.status,
+                "chunks_indexed": doc.chunks_indexed,
+                "pages_indexed": doc.pages_indexed,
+                "total_pages": doc.total_pages
             })
     
     project_dict = project.dict()
     project_dict["documents"] = documents_with_details
     return project_dict
 
+@router.get("/documents/{doc_id}/pages/{page}")
+def get_document_page(doc_id: str, page: int):
+    """Text of one page of an indexed document, read from the file on demand (for citation previews)"""
+    from ..indexing.indexer import indexer
+    text = indexer.get_page_text(doc_id, page)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    return {"document_id": doc_id, "page": page, "text": text}
+
 @router.get("/get-available-files")
 def get_available_files():
     """Get list of available files in the data directory"""
@@ -241,35 +260,26 @@ def get_available_files():
     return {"files": files}
 
 @router.post("/index-document-async")
-def index_document_async(background_tasks: BackgroundTasks, project_id: str, file: UploadFile = File(None), filename: str = Form(None)):
+def index_document_async(project_id: str, file: UploadFile = File(None), filename: str = Form(None)):
     if file:
-        # Handle file upload
-        content = file.file.read()
-        actual_filename = file.filename
+        # Stream the upload to disk; the job only gets a reference to the file
+        file_path, content_hash, _ = save_upload(file.file, file.filename)
     elif filename:
         # Handle existing file by filename
-        import os
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        backend_dir = os.path.dirname(os.path.dirname(current_dir))
-        project_root = os.path.dirname(backend_dir)
-        data_dir = os.path.join(project_root, 'data')
-        file_path = os.path.join(data_dir, filename)
+        file_path = os.path.join(get_data_dir(), os.path.basename(filename))
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail=f"File {filename} not found")
-        
-        with open(file_path, 'rb') as f:
-            content = f.read()
-        actual_filename = filename
+        content_hash = None
     else:
         raise HTTPException(status_code=400, detail="Either file or filename must be provided")
     
     request_id = start_async_task("index_document", {
-        "filename": actual_filename,
-        "content": content,
+        "filename": os.path.basename(file_path),
+        "file_path": file_path,
+        "content_hash": content_hash,
         "project_id": project_id
     })
-    background_tasks.add_task(process_request_async, request_id)
     return {"request_id": request_id}
 
 @router.post("/evaluate-project")
@@ -316,10 +326,11 @@ def add_ground_truth(question_id: str, answer_text: str, source: str = "manual")
         raise HTTPException(status_code=500, detail=f"Failed to add ground truth: {str(e)}")
 
 @router.get("/stream-answers/{project_id}")
-def stream_project_answers(project_id: str):
-    """Stream answers as they are generated in real-time"""
+def stream_project_answers(project_id: str, bypass_cache: bool = False, request_id: Optional[str] = None):
+    """Stream answers as they are generated in real-time; with request_id, follow that pipeline job instead"""
+    events = stream_pipeline(project_id, request_id) if request_id else stream_answers(project_id, use_cache=not bypass_cache)
     return StreamingResponse(
-        stream_answers(project_id),
+        events,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
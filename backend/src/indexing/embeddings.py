@@ -0,0 +1,196 @@
+from abc import ABC, abstractmethod
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from typing import List, Optional
+import hashlib
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from .inverted_index import tokenize
+
+# Embedding configuration
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "mock")  # "mock", "hashing"
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "0"))  # 0 = backend default
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_DB_CACHE_SIZE = int(os.getenv("EMBEDDING_DB_CACHE_SIZE", "500000"))  # rows kept in the SQLite cache, least recently used evicted first
+
+class EmbeddingBackend(Embeddings, ABC):
+    """Batched embedding interface used by DocumentIndexer.
+
+    Backends implement embed_matrix, which returns a float32 array of shape
+    (len(texts), dimension). The list-based LangChain methods are derived from it.
+    A backend without embed_matrix cannot be instantiated.
+    """
+
+    name = "base"
+    dimension = 0
+
+    @abstractmethod
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as a float32 matrix of shape (len(texts), dimension)"""
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_matrix([text])[0].tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return self.embed_matrix(texts).tolist()
+
+class MockEmbeddings(EmbeddingBackend):
+    """Mock embeddings for demo purposes: the MD5 digest of the text scaled to [0, 1]"""
+
+    name = "mock"
+
+    def __init__(self, dimension: int = 16):
+        self.dimension = dimension
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        digests = b"".join(hashlib.md5(text.encode()).digest() for text in texts)
+        values = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), 16).astype(np.float32) / 255.0
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        width = min(16, self.dimension)
+        matrix[:, :width] = values[:, :width]
+        return matrix
+
+class HashingEmbeddings(EmbeddingBackend):
+    """CPU-only local embedder: signed feature hashing of tokens with sublinear TF, L2 normalised"""
+
+    name = "hashing"
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+        self._token_slots = {}
+
+    def _slot(self, token: str):
+        slot = self._token_slots.get(token)
+        if slot is None:
+            hashed = zlib.crc32(token.encode())
+            slot = (hashed % self.dimension, 1.0 if hashed & 0x80000000 else -1.0)
+            if len(self._token_slots) < 500000:
+                self._token_slots[token] = slot
+        return slot
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                column, sign = self._slot(token)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+        counts = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(counts, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)), np.array(signs, dtype=np.float32))
+        # Sublinear term frequency keeps long chunks from dominating
+        matrix = np.sign(counts) * np.log1p(np.abs(counts))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+class CachedEmbeddings(EmbeddingBackend):
+    """Wraps a backend with an in-memory LRU and an optional SQLite cache keyed by text hash.
+
+    The SQLite cache is shared by every process using the index directory, so
+    it runs in WAL mode with a busy timeout like storage/sqlite.py. Each row
+    records when it was last used; once the table passes max_db_entries, the
+    least recently used rows are deleted.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, cache_path: Optional[str] = None, max_entries: int = EMBEDDING_CACHE_SIZE,
+                 max_db_entries: int = EMBEDDING_DB_CACHE_SIZE):
+        self.backend = backend
+        self.name = backend.name
+        self.dimension = backend.dimension
+        self.max_entries = max_entries
+        self.max_db_entries = max_db_entries
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_rows = 0  # row count as of the last eviction check plus rows inserted since
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB, used REAL DEFAULT 0)")
+            if "used" not in [column[1] for column in self._db.execute("PRAGMA table_info(embeddings)")]:
+                # Cache written before rows recorded their last use
+                self._db.execute("ALTER TABLE embeddings ADD COLUMN used REAL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+            self._db.commit()
+            self._db_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        return f"{self.name}:{self.dimension}:" + hashlib.sha1(text.encode()).hexdigest()
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    matrix[i] = vector
+                else:
+                    missing.append(i)
+            if missing and self._db is not None:
+                still_missing, used = [], []
+                for i in missing:
+                    row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (keys[i],)).fetchone()
+                    if row:
+                        matrix[i] = np.frombuffer(row[0], dtype=np.float32)
+                        self._remember(keys[i], matrix[i].copy())
+                        used.append(keys[i])
+                    else:
+                        still_missing.append(i)
+                missing = still_missing
+                if used:
+                    now = time.time()
+                    self._db.executemany("UPDATE embeddings SET used = ? WHERE key = ?", [(now, key) for key in used])
+                    self._db.commit()
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            computed = self.backend.embed_matrix([texts[i] for i in missing])
+            matrix[missing] = computed
+            with self._lock:
+                for i, vector in zip(missing, computed):
+                    self._remember(keys[i], vector)
+                if self._db is not None:
+                    now = time.time()
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector, used) VALUES (?, ?, ?)",
+                        [(keys[i], vector.tobytes(), now) for i, vector in zip(missing, computed)]
+                    )
+                    self._db_rows += len(missing)
+                    if self._db_rows > self.max_db_entries:
+                        self._evict()
+                    self._db.commit()
+        return matrix
+
+    def _evict(self):
+        # Other processes insert too, so count before deleting; evicting to 90% spreads the cost over many inserts
+        self._db_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._db_rows - int(self.max_db_entries * 0.9)
+        if self._db_rows > self.max_db_entries and excess > 0:
+            self._db.execute("DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY used LIMIT ?)", (excess,))
+            self._db_rows -= excess
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+def get_embedding_backend(name: str = EMBEDDING_BACKEND, dimension: int = EMBEDDING_DIM) -> EmbeddingBackend:
+    """Create the configured embedding backend"""
+    backends = {
+        "mock": MockEmbeddings,
+        "hashing": HashingEmbeddings,
+    }
+    if name not in backends:
+        raise ValueError(f"Unknown embedding backend: {name}")
+    return backends[name](dimension) if dimension else backends[name]()
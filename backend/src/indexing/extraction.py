@@ -0,0 +1,213 @@
+"""Text extraction and chunking.
+
+Everything here is a plain module-level function with no index state, so it
+can run in a worker process (see src/utils/pools.py) as well as inline.
+Format readers live in src/indexing/formats and are imported on first use
+through EXTRACTORS, so importing this module (and with it the API) does not
+load the PDF, Office or text splitter libraries.
+"""
+import bisect
+import importlib
+import mimetypes
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 1500  # Larger chunks to preserve more context
+CHUNK_OVERLAP = 300  # More overlap to maintain continuity
+
+# File extension -> format module; a bare name is a module in src/indexing/formats (see its docstring)
+EXTRACTORS = {
+    ".pdf": "pdf",
+    ".txt": "text",
+    ".docx": "word",
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".pptx": "powerpoint",
+    ".ppt": "powerpoint"
+}
+
+# MIME type -> format module, for files whose extension is missing or unknown
+MIME_EXTRACTORS = {
+    "application/pdf": "pdf",
+    "text/plain": "text",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "word",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "excel",
+    "application/vnd.ms-excel": "excel",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": "powerpoint",
+    "application/vnd.ms-powerpoint": "powerpoint"
+}
+
+def register_extractor(module: str, extensions: Iterable[str] = (), mime_types: Iterable[str] = ()):
+    """Route extensions and MIME types to a format module: a name in src/indexing/formats or a dotted module path"""
+    for extension in extensions:
+        EXTRACTORS[extension.lower()] = module
+    for mime_type in mime_types:
+        MIME_EXTRACTORS[mime_type.lower()] = module
+
+def _format(name: str):
+    if "." in name:
+        return importlib.import_module(name)
+    return importlib.import_module(f"{__package__}.formats.{name}")
+
+def get_format(file_path: str, mime_type: Optional[str] = None):
+    """The format module for a file, imported on first use; None if unsupported.
+
+    Looked up by extension first, then by the given MIME type, then by the
+    MIME type guessed from the file name.
+    """
+    name = EXTRACTORS.get(os.path.splitext(file_path)[1].lower())
+    if name is None:
+        mime_type = mime_type or mimetypes.guess_type(file_path)[0]
+        name = MIME_EXTRACTORS.get(mime_type.lower()) if mime_type else None
+    return _format(name) if name else None
+
+def iter_segments(file_path: str, mime_type: Optional[str] = None) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield (page_number, text) segments of a file as its format module reads them"""
+    fmt = get_format(file_path, mime_type)
+    if fmt is None:
+        print(f"Unsupported file type: {file_path}")
+        return iter(())
+    return fmt.iter_segments(file_path)
+
+def extract_text_from_file(file_path: str, mime_type: Optional[str] = None) -> str:
+    """Extract text from various file formats"""
+    return "".join(text + "\n" for _, text in iter_segments(file_path, mime_type))
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extract text from PDF file"""
+    return "".join(text + "\n" for _, text in _format("pdf").iter_pdf_pages(file_path))
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages in a PDF (0 if it cannot be read)"""
+    return _format("pdf").pdf_page_count(file_path)
+
+def parallel_pdf(file_path: str, page_count: Optional[int] = None) -> bool:
+    """Whether this file is a PDF long enough to be extracted across the process pool"""
+    return file_path.endswith('.pdf') and _format("pdf").parallel_pdf(file_path, page_count)
+
+def extract_page_text(file_path: str, page_number: int) -> Optional[str]:
+    """Text of a single PDF page, or None if the file has no such page"""
+    if not file_path.endswith('.pdf'):
+        return None
+    return _format("pdf").extract_page_text(file_path, page_number)
+
+def _text_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    # Split text into chunks with better strategy for headers
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n\n\n", "\n\n", "\n", ". ", " ", ""]  # Prioritize paragraph breaks
+    )
+
+def split_text(text: str) -> List[dict]:
+    """Split plain text into chunks (see split_pages)"""
+    return split_pages([(None, text)])
+
+def split_pages(pages: Iterable[Tuple[Optional[int], str]]) -> List[dict]:
+    """Split page segments into a list of chunks (see iter_chunks)"""
+    return list(iter_chunks(pages))
+
+def iter_chunks(pages: Iterable[Tuple[Optional[int], str]]) -> Iterator[dict]:
+    """Split page segments into chunks, yielding each chunk as soon as it is final.
+
+    Only a few chunks' worth of text is buffered. Once the buffer is large
+    enough, every chunk but the last is final. The last chunk may continue on
+    the next page, so it stays in the buffer and is split again. Each chunk
+    records the page it starts and ends on and its character offsets in the
+    concatenated document text.
+    """
+    splitter = _text_splitter()
+    chunk_count = 0
+    page_offsets, page_numbers = [], []
+    buffer, buffer_start, total = "", 0, 0
+
+    def page_at(offset: int) -> Optional[int]:
+        return page_numbers[bisect.bisect_right(page_offsets, offset) - 1] if page_offsets else None
+
+    def flush(final: bool) -> List[dict]:
+        nonlocal buffer, buffer_start, chunk_count
+        pieces = splitter.split_text(buffer)
+        chunks = []
+        search_from = 0
+        for n, piece in enumerate(pieces):
+            offset = buffer.find(piece, search_from)
+            if offset < 0:
+                offset = search_from
+            if not final and n == len(pieces) - 1:
+                # Re-split the unfinished tail together with the next page
+                buffer, buffer_start = buffer[offset:], buffer_start + offset
+                return chunks
+            search_from = offset + 1
+            start = buffer_start + offset
+            chunks.append({
+                "chunk_index": chunk_count,
+                "text": piece,
+                "page": page_at(start),
+                "page_end": page_at(start + len(piece) - 1),
+                "start": start,
+                "end": start + len(piece)
+            })
+            chunk_count += 1
+        buffer, buffer_start = "", buffer_start + len(buffer)
+        return chunks
+
+    for page_number, text in pages:
+        page_offsets.append(total)
+        page_numbers.append(page_number)
+        text += "\n"
+        buffer += text
+        total += len(text)
+        if len(buffer) > 4 * CHUNK_SIZE:
+            yield from (chunk for chunk in flush(final=False) if chunk["text"].strip())
+    yield from (chunk for chunk in flush(final=True) if chunk["text"].strip())
+
+def segments_as_chunks(segments: Iterable[Tuple[Optional[int], str]]) -> Iterator[dict]:
+    """Chunk structural segments (row groups, slides, sections): one chunk each, with the same fields as iter_chunks.
+
+    Segments never overlap each other. Only a segment longer than CHUNK_SIZE
+    is split, with the usual overlap between its own pieces.
+    """
+    splitter = None
+    chunk_count, total = 0, 0
+    for page_number, text in segments:
+        if len(text) <= CHUNK_SIZE:
+            pieces = [text]
+        else:
+            splitter = splitter or _text_splitter()
+            pieces = splitter.split_text(text)
+        search_from = 0
+        for piece in pieces:
+            offset = text.find(piece, search_from)
+            if offset < 0:
+                offset = search_from
+            search_from = offset + 1
+            if piece.strip():
+                yield {
+                    "chunk_index": chunk_count,
+                    "text": piece,
+                    "page": page_number,
+                    "page_end": page_number,
+                    "start": total + offset,
+                    "end": total + offset + len(piece)
+                }
+                chunk_count += 1
+        total += len(text) + 1
+
+def iter_document_chunks(file_path: str, mime_type: Optional[str] = None, page_count: Optional[int] = None) -> Iterator[dict]:
+    """Chunks of a file, produced while its pages are still being read (page_count if already known)"""
+    fmt = get_format(file_path, mime_type)
+    if fmt is None:
+        print(f"Unsupported file type: {file_path}")
+        return iter(())
+    if page_count is None:
+        segments = fmt.iter_segments(file_path)
+    else:
+        segments = fmt.iter_segments(file_path, page_count=page_count)
+    if getattr(fmt, "CHUNKED", False):
+        return segments_as_chunks(segments)
+    return iter_chunks(segments)
+
+def prepare_document(file_path: str, page_count: Optional[int] = None) -> List[dict]:
+    """Extract and chunk a file page by page: the CPU-bound half of indexing"""
+    return list(iter_document_chunks(file_path, page_count=page_count))
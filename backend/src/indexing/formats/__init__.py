@@ -0,0 +1,10 @@
+"""Format readers, one module per file type, imported on first use (see extraction.EXTRACTORS).
+
+A format module provides iter_segments(file_path), yielding (page_number,
+text) pieces of the document as they are read; page_number is None for
+formats without pages. A paged format may also accept a page_count
+keyword, which callers pass when they already counted the pages. A module
+that sets CHUNKED = True yields structural units (row groups, slides,
+sections) that become one chunk each, without overlap; other formats go
+through the text splitter (extraction.iter_chunks).
+"""
@@ -0,0 +1,26 @@
+import openpyxl
+from typing import Iterator, Optional, Tuple
+from .tables import iter_row_groups
+
+CHUNKED = True  # yields row groups, indexed as chunks
+
+def iter_segments(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield each sheet as groups of whole rows, headed by the sheet name and header row.
+
+    The workbook is read in read-only mode, which streams rows from the file
+    instead of building every cell in memory, so the cost is bounded by one
+    row group rather than the size of the model.
+    """
+    try:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    except Exception as e:
+        print(f"Error reading Excel file {file_path}: {e}")
+        return
+    try:
+        for sheet in workbook.worksheets:
+            for group in iter_row_groups(f"Sheet: {sheet.title}", sheet.iter_rows(values_only=True)):
+                yield None, group
+    except Exception as e:
+        print(f"Error reading Excel file {file_path}: {e}")
+    finally:
+        workbook.close()
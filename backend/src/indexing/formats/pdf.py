@@ -0,0 +1,77 @@
+import os
+import pymupdf
+import threading
+from pypdf import PdfReader
+from typing import Iterator, List, Optional, Tuple
+from ...utils.pools import map_in_process, pool_parallelism
+
+PDF_PAGE_BATCH = int(os.getenv("PDF_PAGE_BATCH", "16"))  # pages extracted per task
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "48"))  # shorter PDFs are extracted in one process
+
+_pymupdf_lock = threading.Lock()  # PyMuPDF must not be used from several threads at once
+
+def iter_segments(file_path: str, page_count: Optional[int] = None) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield (page_number, text) for each page"""
+    return iter_pdf_pages(file_path, page_count)
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages in a PDF (0 if it cannot be read)"""
+    try:
+        with _pymupdf_lock, pymupdf.open(file_path) as doc:
+            return doc.page_count
+    except Exception:
+        try:
+            return len(PdfReader(file_path).pages)
+        except Exception as e:
+            print(f"Error reading PDF file {file_path}: {e}")
+            return 0
+
+def parallel_pdf(file_path: str, page_count: Optional[int] = None) -> bool:
+    """Whether iter_pdf_pages will spread this file's pages across the process pool"""
+    if pool_parallelism() <= 1:
+        return False
+    if page_count is None:
+        page_count = pdf_page_count(file_path)
+    return page_count >= PDF_PARALLEL_MIN_PAGES
+
+def extract_pdf_page_range(file_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """(page_number, text) for the 0-based pages start..stop-1, using PyMuPDF with a pypdf fallback"""
+    try:
+        with _pymupdf_lock, pymupdf.open(file_path) as doc:
+            return [(n + 1, doc.load_page(n).get_text()) for n in range(start, min(stop, doc.page_count))]
+    except Exception as e:
+        print(f"PyMuPDF failed on {file_path}: {e}, falling back to pypdf")
+    try:
+        reader = PdfReader(file_path)
+        return [(n + 1, reader.pages[n].extract_text() or "") for n in range(start, min(stop, len(reader.pages)))]
+    except Exception as e:
+        print(f"Error reading PDF file {file_path}: {e}")
+        return []
+
+def iter_pdf_pages(file_path: str, page_count: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for each page of a PDF, starting at 1.
+
+    Pages are extracted in batches of PDF_PAGE_BATCH. Long PDFs have their
+    batches spread across the process pool and reassembled in page order;
+    short ones are read in this process, where a pool would cost more than
+    it saves. page_count saves opening the file to count pages if the
+    caller already did.
+    """
+    if page_count is None:
+        page_count = pdf_page_count(file_path)
+    starts = range(0, page_count, PDF_PAGE_BATCH)
+    stops = [min(start + PDF_PAGE_BATCH, page_count) for start in starts]
+    paths = [file_path] * len(starts)
+    if page_count >= PDF_PARALLEL_MIN_PAGES:
+        batches = map_in_process(extract_pdf_page_range, paths, starts, stops)
+    else:
+        batches = map(extract_pdf_page_range, paths, starts, stops)
+    for batch in batches:
+        yield from batch
+
+def extract_page_text(file_path: str, page_number: int) -> Optional[str]:
+    """Text of a single PDF page, or None if the file has no such page"""
+    if page_number < 1:
+        return None
+    pages = extract_pdf_page_range(file_path, page_number - 1, page_number)
+    return pages[0][1] if pages else None
@@ -0,0 +1,18 @@
+from pptx import Presentation
+from typing import Iterator, Optional, Tuple
+
+CHUNKED = True  # one chunk per slide
+
+def iter_segments(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield a PPTX file one slide at a time"""
+    try:
+        presentation = Presentation(file_path)
+        for slide_number, slide in enumerate(presentation.slides, 1):
+            lines = [f"Slide {slide_number}:"]
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text:
+                    lines.append(shape.text)
+            if len(lines) > 1:
+                yield None, "\n".join(lines)
+    except Exception as e:
+        print(f"Error reading PowerPoint file {file_path}: {e}")
@@ -0,0 +1,35 @@
+from typing import Iterable, Iterator, Optional, Sequence
+from ..extraction import CHUNK_SIZE
+
+def format_row(cells: Sequence) -> str:
+    """One table row as a line, cells separated by ' | ' and empty cells dropped"""
+    return " | ".join(str(cell).strip() for cell in cells if cell is not None and str(cell).strip())
+
+def iter_row_groups(title: str, rows: Iterable[Sequence]) -> Iterator[str]:
+    """Group a table's rows into chunks of up to CHUNK_SIZE characters.
+
+    The first non-empty row is taken as the header and repeated under the
+    title at the top of every group, so each chunk can be read on its own.
+    Rows are never split and groups do not overlap.
+    """
+    header: Optional[str] = None
+    lines = []
+    size = 0
+    for row in rows:
+        line = format_row(row)
+        if not line:
+            continue
+        if header is None:
+            header = line
+            size = len(title) + len(header) + 2
+            continue
+        if lines and size + len(line) + 1 > CHUNK_SIZE:
+            yield "\n".join([title, header, *lines])
+            lines, size = [], len(title) + len(header) + 2
+        lines.append(line)
+        size += len(line) + 1
+    if lines:
+        yield "\n".join([title, header, *lines])
+    elif header is not None:
+        # Single-row table
+        yield "\n".join([title, header])
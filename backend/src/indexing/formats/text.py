@@ -0,0 +1,24 @@
+from typing import Iterator, Optional, Tuple
+
+BLOCK_CHARS = 64 * 1024  # text yielded per segment
+
+def iter_segments(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield a TXT file in blocks of whole lines"""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            block, size = [], 0
+            for line in f:
+                block.append(line)
+                size += len(line)
+                if size >= BLOCK_CHARS:
+                    yield None, _segment(block)
+                    block, size = [], 0
+            if block:
+                yield None, _segment(block)
+    except Exception as e:
+        print(f"Error reading TXT file {file_path}: {e}")
+
+def _segment(lines) -> str:
+    # Segments are joined with a newline, so drop the block's own trailing one
+    text = "".join(lines)
+    return text[:-1] if text.endswith("\n") else text
@@ -0,0 +1,63 @@
+from docx import Document as DocxDocument
+from docx.table import Table
+from typing import Iterator, List, Optional, Tuple
+from ..extraction import CHUNK_SIZE
+from .tables import iter_row_groups
+
+CHUNKED = True  # yields sections and table row groups, indexed as chunks
+
+def iter_segments(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield a DOCX file in reading order: prose by section, tables by row group.
+
+    A section starts at each heading. Consecutive short sections are packed
+    together up to CHUNK_SIZE; longer ones are split when chunked. Tables
+    are titled with the heading they appear under.
+    """
+    try:
+        doc = DocxDocument(file_path)
+        heading = ""
+        packed: List[str] = []  # sections waiting to be yielded together
+        section: List[str] = []
+
+        def close_section():
+            nonlocal packed, section
+            text = "\n".join(section)
+            section = []
+            if not text.strip():
+                return
+            if packed and len("\n\n".join(packed)) + len(text) + 2 > CHUNK_SIZE:
+                yield None, "\n\n".join(packed)
+                packed = []
+            packed.append(text)
+
+        def flush():
+            nonlocal packed
+            yield from close_section()
+            if packed:
+                yield None, "\n\n".join(packed)
+                packed = []
+
+        for block in doc.iter_inner_content():
+            if isinstance(block, Table):
+                yield from flush()
+                for group in iter_row_groups(f"Table: {heading}" if heading else "Table", _table_rows(block)):
+                    yield None, group
+            else:
+                style = block.style.name if block.style is not None else ""
+                if style.startswith("Heading") or style == "Title":
+                    yield from close_section()
+                    heading = block.text.strip()
+                section.append(block.text)
+        yield from flush()
+    except Exception as e:
+        print(f"Error reading DOCX file {file_path}: {e}")
+
+def _table_rows(table: Table) -> Iterator[List[str]]:
+    for row in table.rows:
+        cells, seen = [], []
+        for cell in row.cells:
+            # Merged cells appear once per grid column they span
+            if not any(cell._tc is tc for tc in seen):
+                seen.append(cell._tc)
+                cells.append(cell.text)
+        yield cells
@@ -1,240 +1,704 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_core.embeddings import Embeddings
-import numpy as np
+import asyncio
 import hashlib
-from ..models import Document
+import itertools
+import json
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterable, List, Optional
+from ..models import Document, DocumentStatus
 from ..storage.memory import storage
+from .inverted_index import InvertedIndex, tokenize
+from .keywords import QueryExpander
+from .retrieval_cache import RetrievalCache, normalize_query
+from .writer_lock import acquire_index_writer
+from . import extraction
+from ..utils.lazy import lazy_import
+from ..utils.pools import run_in_process
+import threading
+import time
 import uuid
-from pypdf import PdfReader
 import os
-from docx import Document as DocxDocument
-import openpyxl
-from pptx import Presentation
 
-class MockEmbeddings(Embeddings):
-    """Mock embeddings for demo purposes"""
-    
-    def embed_query(self, text: str) -> list:
-        # Create a deterministic hash-based embedding
-        hash_obj = hashlib.md5(text.encode())
-        hash_bytes = hash_obj.digest()
-        # Convert to float array and normalize
-        embedding = np.array([b / 255.0 for b in hash_bytes])
-        # Pad to 1536 dimensions (OpenAI ada-002 dimension)
-        embedding = np.pad(embedding, (0, 1536 - len(embedding)), 'constant')
-        return embedding.tolist()
+if TYPE_CHECKING:
+    from .embeddings import EmbeddingBackend
+
+# The vector backend (faiss, numpy, langchain) loads when the indexer first needs it, not on import
+faiss = lazy_import("faiss")
+np = lazy_import("numpy")
+
+# Persisted index location (FAISS index, chunk file and manifest)
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(_backend_dir, "index_store"))
+
+# Bump these when extraction or chunking changes so cached documents get re-processed
+EXTRACTOR_VERSION = "4"
+CHUNKER_VERSION = "3"
+INDEX_FORMAT = 3  # layout of the persisted index; older layouts are re-indexed
+
+INDEX_BATCH_CHUNKS = int(os.getenv("INDEX_BATCH_CHUNKS", "64"))  # chunks embedded and committed at a time
+INDEX_PROGRESS_INTERVAL = float(os.getenv("INDEX_PROGRESS_INTERVAL", "1"))  # seconds between progress saves
+INDEX_COMPACT_DEAD_RATIO = float(os.getenv("INDEX_COMPACT_DEAD_RATIO", "0.5"))  # share of deleted chunk text that triggers compaction on save
+
+def _fsync_file(path: str):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+class SearchResult:
+    """Keyword search hit shaped like a FAISS result"""
     
-    def embed_documents(self, texts: list) -> list:
-        return [self.embed_query(text) for text in texts]
+    def __init__(self, page_content, metadata, score):
+        self.page_content = page_content
+        self.metadata = metadata
+        self.score = score
 
 class DocumentIndexer:
-    def __init__(self):
-        # Use mock embeddings for demo
-        self.embeddings = MockEmbeddings()
+    def __init__(self, index_dir: str = INDEX_DIR, embeddings: "EmbeddingBackend" = None, keyword_mappings: Optional[dict] = None):
+        from .embeddings import CachedEmbeddings, get_embedding_backend
+        # Configured backend (mock embeddings by default), cached by text hash
+        cache_path = os.path.join(index_dir, "embedding_cache.sqlite") if index_dir else None
+        self.embeddings = CachedEmbeddings(embeddings or get_embedding_backend(), cache_path)
         self.vectorstore = None
+        self.inverted_index = InvertedIndex()
         self.documents_indexed = set()
+        # doc_id -> {"filename": ..., "chunk_ids": [int, ...], "cache_key": ...}, persisted with the index
+        self.documents = {}
+        # ingestion cache: content hash + extractor/chunker version -> doc_id
+        self.sources = {}
+        self.index_dir = index_dir
+        # Last generation saved or loaded; each save writes generation + 1 (see save)
+        self.generation = 0
+        # Manifest (inode, modification time) when it was last loaded or saved here (see refresh)
+        self._manifest_stat = None
+        # Serializes loads, so an older generation can never replace a newer one
+        self._load_lock = threading.RLock()
+        # Background reload started by refresh(wait=False), if one is running
+        self._reloader = None
+        self._reloader_lock = threading.Lock()
+        # Chunk text blob named by that manifest, kept until a later save no longer needs it
+        self._saved_blob = None
+        self._index_is_mmapped = False
+        self._dirty = False
+        # FAISS position lookups for scoped searches, rebuilt after the index changes
+        self._chunk_positions = None
+        self._scope_selectors = OrderedDict()
+        # Bumped whenever chunks are added or removed; part of every retrieval cache key
+        self.version = 0
+        self.retrieval_cache = RetrievalCache()
+        # Question pattern -> content keywords used by enhanced keyword search (see keywords.py)
+        self.query_expander = QueryExpander(keyword_mappings)
+        # Guards the FAISS index, postings and document maps while ingestion runs in worker threads
+        self._lock = threading.RLock()
+        # Serializes saves, which write files outside _lock
+        self._save_lock = threading.Lock()
+        # Cache key or file path -> Event set when the ingest in flight for it finishes
+        self._ingesting = {}
+        self.load()
 
-    def extract_text_from_file(self, file_path: str) -> str:
-        """Extract text from various file formats"""
-        if file_path.endswith('.pdf'):
-            return self.extract_text_from_pdf(file_path)
-        elif file_path.endswith('.txt'):
-            return self.extract_text_from_txt(file_path)
-        elif file_path.endswith('.docx'):
-            return self.extract_text_from_docx(file_path)
-        elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-            return self.extract_text_from_excel(file_path)
-        elif file_path.endswith('.pptx') or file_path.endswith('.ppt'):
-            return self.extract_text_from_powerpoint(file_path)
-        else:
-            print(f"Unsupported file type: {file_path}")
-            return ""
-
-    def extract_text_from_txt(self, file_path: str) -> str:
-        """Extract text from TXT file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
-        except Exception as e:
-            print(f"Error reading TXT file {file_path}: {e}")
-            return ""
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.index_dir, "manifest.json")
 
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        except Exception as e:
-            print(f"Error reading PDF file {file_path}: {e}")
-            return ""
+    @property
+    def chunks_path(self) -> str:
+        """Chunk text blob of a new index; compaction moves the texts to chunks.<generation>.bin"""
+        return os.path.join(self.index_dir, "chunks.bin")
 
-    def extract_text_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
-        try:
-            doc = DocxDocument(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            # Also extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + " "
-                    text += "\n"
-            return text
-        except Exception as e:
-            print(f"Error reading DOCX file {file_path}: {e}")
-            return ""
+    def _generation_paths(self, generation: int) -> dict:
+        """Files of one saved generation; the chunk text blob is shared by generations because it is only ever appended to"""
+        return {
+            name: os.path.join(self.index_dir, f"{stem}.{generation}.{ext}")
+            for name, stem, ext in (("index", "faiss", "index"), ("inverted", "inverted", "pkl"), ("columns", "chunks", "cols"))
+        }
+
+    def load(self):
+        """Reload a persisted index; the FAISS vectors are memory-mapped, not read into RAM.
 
-    def extract_text_from_excel(self, file_path: str) -> str:
-        """Extract text from Excel file (XLSX/XLS)"""
+        The manifest names the generation to read, and every file of that
+        generation must agree with it. The keyword postings and chunk columns
+        are still unpickled into memory, which is why searches leave reloads
+        to a background thread (see refresh).
+        """
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        if not self.index_dir or not os.path.exists(self.manifest_path):
+            return
+        from langchain_community.vectorstores import FAISS
+        from ..storage.chunk_store import ChunkStore
         try:
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            text = ""
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text += f"Sheet: {sheet_name}\n"
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join([str(cell) for cell in row if cell is not None])
-                    if row_text.strip():
-                        text += row_text + "\n"
-                text += "\n"
-            return text
+            # Taken before reading, so a save that lands meanwhile is picked up by the next refresh
+            self._manifest_stat = self._stat_manifest()
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("format") != INDEX_FORMAT:
+                raise ValueError("index was saved in an older format; re-index required")
+            generation = manifest["generation"]
+            paths = self._generation_paths(generation)
+            try:
+                index = faiss.read_index(paths["index"], faiss.IO_FLAG_MMAP_IFC)
+                index_is_mmapped = True
+            except RuntimeError:
+                index = faiss.read_index(paths["index"])
+                index_is_mmapped = False
+            if index.d != self.embeddings.dimension:
+                raise ValueError(f"index dimension {index.d} does not match {self.embeddings.name} embeddings ({self.embeddings.dimension}); re-index required")
+            if index.ntotal != len(manifest["index_to_docstore_id"]):
+                raise ValueError(f"generation {generation} has {index.ntotal} vectors but {len(manifest['index_to_docstore_id'])} chunk ids")
+            blob = manifest.get("chunks_blob", os.path.basename(self.chunks_path))
+            vectorstore = FAISS(
+                self.embeddings,
+                index,
+                ChunkStore.load(os.path.join(self.index_dir, blob), paths["columns"], generation),
+                dict(enumerate(manifest["index_to_docstore_id"]))
+            )
+            inverted_index = InvertedIndex.load(paths["inverted"], generation)
+            documents = manifest["documents"]
         except Exception as e:
-            print(f"Error reading Excel file {file_path}: {e}")
-            return ""
+            # Nothing is replaced, so a failed reload keeps serving the generation already loaded
+            print(f"Failed to load persisted index from {self.index_dir}: {e}")
+            return
+        # Documents saved part-way through ingestion stay searchable but are not cached as done
+        documents_indexed = {doc_id for doc_id, info in documents.items() if info.get("complete", True)}
+        with self._lock:
+            self.vectorstore = vectorstore
+            self._index_is_mmapped = index_is_mmapped
+            self.inverted_index = inverted_index
+            self.documents = documents
+            self.documents_indexed = documents_indexed
+            self.sources = {
+                info["cache_key"]: doc_id for doc_id, info in documents.items()
+                if info.get("cache_key") and doc_id in documents_indexed
+            }
+            self.generation = generation
+            self._saved_blob = blob
+            self._index_changed()
+        # Register lightweight documents so project lookups keep working after a restart
+        for doc_id, info in documents.items():
+            if not storage.get_document(doc_id):
+                status = DocumentStatus.INDEXED if doc_id in documents_indexed else DocumentStatus.INDEXING
+                storage.save_document(Document(id=doc_id, filename=info["filename"], content="", chunks=[], status=status))
+        print(f"Loaded persisted index from {self.index_dir}: generation {generation}, {len(documents)} documents, {index.ntotal} vectors")
 
-    def extract_text_from_powerpoint(self, file_path: str) -> str:
-        """Extract text from PowerPoint file (PPTX/PPT)"""
+    def _stat_manifest(self):
+        # os.replace gives every saved manifest a new inode, so this changes even when mtimes are coarse
         try:
-            presentation = Presentation(file_path)
-            text = ""
-            for slide_number, slide in enumerate(presentation.slides, 1):
-                text += f"Slide {slide_number}:\n"
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text:
-                        text += shape.text + "\n"
-                text += "\n"
-            return text
-        except Exception as e:
-            print(f"Error reading PowerPoint file {file_path}: {e}")
-            return ""
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self, wait: bool = True):
+        """Reload the index if another process saved a newer generation; one stat when nothing changed.
+
+        With wait=False (searches), the reload runs in a background thread,
+        at most one at a time, and the generation already loaded keeps
+        serving until it is swapped in. Only an indexer with nothing loaded
+        yet waits.
+        """
+        if not self.index_dir:
+            return
+        manifest_stat = self._stat_manifest()
+        if manifest_stat is None or manifest_stat == self._manifest_stat:
+            return
+        if wait or self.vectorstore is None:
+            self._reload_if_changed()
+            return
+        with self._reloader_lock:
+            if self._reloader is None or not self._reloader.is_alive():
+                self._reloader = threading.Thread(target=self._reload_if_changed, name="index-reload", daemon=True)
+                self._reloader.start()
+
+    def _reload_if_changed(self):
+        with self._load_lock:
+            manifest_stat = self._stat_manifest()
+            if manifest_stat is not None and manifest_stat != self._manifest_stat:
+                self._load()
 
-    def index_document(self, doc: Document):
-        """Index a document into the vector store"""
+    def _claim_writer(self):
+        """Take the index directory's writer lock, catching up with whatever an earlier writer saved"""
+        if not acquire_index_writer(self.index_dir):
+            raise RuntimeError(f"Another process is writing the index in {self.index_dir}")
+        self.refresh()
+
+    def save(self):
+        """Persist the FAISS index, chunk metadata and indexed documents to disk.
+
+        Each save writes a new generation of files next to the current one and
+        then replaces the manifest, which names the generation, in one rename:
+        a crash at any point leaves the previous generation loadable. The
+        generation before the new one is kept for readers still loading it.
+        The index lock is only held while the state is serialized in memory;
+        writing and fsyncing happen outside it, so searches keep running.
+        Once deleted chunks take up INDEX_COMPACT_DEAD_RATIO of the chunk
+        text blob, the live texts are first copied to a new blob for the new
+        generation, so re-indexing does not grow the store without bound.
+        """
+        with self._save_lock:
+            if not self.index_dir or self.vectorstore is None or not self._dirty:
+                return
+            # Before the index lock: catching up takes _load_lock, which a background reload holds while it waits for _lock
+            self._claim_writer()
+            with self._lock:
+                generation = self.generation + 1
+                docstore = self.vectorstore.docstore
+            if docstore.dead_ratio > INDEX_COMPACT_DEAD_RATIO:
+                print(f"Compacting chunk texts ({docstore.dead_bytes} of {docstore.blob_bytes} bytes deleted)")
+                docstore.compact(os.path.join(self.index_dir, f"chunks.{generation}.bin"))
+            with self._lock:
+                blob = os.path.basename(docstore.path)
+                index_to_docstore_id = self.vectorstore.index_to_docstore_id
+                manifest = json.dumps({
+                    "format": INDEX_FORMAT,
+                    "generation": generation,
+                    "documents": self.documents,
+                    "chunks_blob": blob,
+                    # FAISS positions are contiguous, so the mapping is stored as a list
+                    "index_to_docstore_id": [index_to_docstore_id[position] for position in range(len(index_to_docstore_id))]
+                })
+                state = {
+                    "index": faiss.serialize_index(self.vectorstore.index),
+                    "inverted": self.inverted_index.dumps(generation),
+                    "columns": self.vectorstore.docstore.dumps(generation)
+                }
+                self._dirty = False
+            try:
+                os.makedirs(self.index_dir, exist_ok=True)
+                paths = self._generation_paths(generation)
+                for name, data in state.items():
+                    with open(paths[name], 'wb') as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                _fsync_file(docstore.path)
+                with open(self.manifest_path + ".tmp", 'w') as f:
+                    f.write(manifest)
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self._load_lock:
+                    # Recorded with the rename, so refresh never mistakes this save for another process's
+                    os.replace(self.manifest_path + ".tmp", self.manifest_path)
+                    self._manifest_stat = self._stat_manifest()
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                raise
+            self.generation = generation
+            previous_blob, self._saved_blob = self._saved_blob, blob
+            self._remove_old_generations(keep=(generation, generation - 1), keep_blobs=(blob, previous_blob))
+
+    def _remove_old_generations(self, keep, keep_blobs=()):
+        keep_files = {os.path.basename(path) for generation in keep for path in self._generation_paths(generation).values()}
+        keep_files.update(name for name in keep_blobs if name)
+        for name in os.listdir(self.index_dir):
+            stem, _, rest = name.partition(".")
+            if stem in ("faiss", "inverted", "chunks") and name not in keep_files:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+
+    def _ensure_writable(self):
+        # A memory-mapped index is read-only; copy it into memory before the first add/remove
+        if self._index_is_mmapped:
+            self.vectorstore.index = faiss.deserialize_index(faiss.serialize_index(self.vectorstore.index))
+            self._index_is_mmapped = False
+
+    def _create_vectorstore(self):
+        from langchain_community.vectorstores import FAISS
+        from ..storage.chunk_store import ChunkStore
+        if self.index_dir:
+            # Stale chunk file from an index that was never saved, or from the old JSON lines layout
+            for stale in (self.chunks_path, os.path.join(self.index_dir, "chunks.jsonl")):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        docstore = ChunkStore(self.chunks_path if self.index_dir else None)
+        return FAISS(self.embeddings, faiss.IndexFlatL2(self.embeddings.dimension), docstore, {})
+
+    def _get_chunk(self, chunk_id: int):
+        """Look up a stored chunk (text and metadata) by id"""
+        chunk = self.vectorstore.docstore.search(chunk_id)
+        return None if isinstance(chunk, str) else chunk
+
+    def _keyword_results(self, term_weights: dict, k: int, document_ids=None):
+        """Run a BM25 query over the inverted index and load the matching chunks"""
+        return self._keyword_results_many([term_weights], k, document_ids=document_ids)[0]
+
+    def _keyword_results_many(self, queries: List[dict], k: int, document_ids=None) -> List[list]:
+        """_keyword_results for several queries with one scan of the inverted index"""
+        with self._lock:
+            if self.vectorstore is None:
+                return [[] for _ in queries]
+            hits = self.inverted_index.search_many(queries, k=k, document_ids=document_ids)
+        results = []
+        for query_hits in hits:
+            query_results = []
+            for chunk_id, score in query_hits:
+                chunk = self._get_chunk(chunk_id)
+                if chunk:
+                    query_results.append(SearchResult(page_content=chunk.page_content, metadata=chunk.metadata, score=score))
+            results.append(query_results)
+        return results
+
+    def extract_text_from_file(self, file_path: str) -> str:
+        return extraction.extract_text_from_file(file_path)
+
+    def extract_text_from_pdf(self, file_path: str) -> str:
+        return extraction.extract_text_from_pdf(file_path)
+
+    def get_page_text(self, doc_id: str, page_number: int) -> Optional[str]:
+        """Re-read one page of an indexed document from its file (for citations)"""
+        self.refresh(wait=False)
+        info = self.documents.get(doc_id)
+        if not info or not os.path.exists(info["filename"]):
+            return None
+        return extraction.extract_page_text(info["filename"], page_number)
+
+    def index_document(self, doc: Document, chunks: Optional[Iterable[dict]] = None, on_progress=None):
+        """Index a document into the vector store; chunks come from extraction.iter_chunks if already split.
+
+        Chunks are embedded and committed in batches of INDEX_BATCH_CHUNKS as
+        extraction produces them. A long document is searchable, and reported
+        through on_progress(doc), while its tail is still being read. Files are
+        read page by page and the full text is not kept in doc.content; chunk
+        texts and metadata go to the chunk store only, and the document just
+        counts them in chunks_indexed.
+        """
         if doc.id in self.documents_indexed:
             return  # Already indexed
         
-        # Extract text if not already done
-        if not doc.content.strip():
-            if os.path.exists(doc.filename):
-                doc.content = self.extract_text_from_file(doc.filename)
+        # The page count is read once and handed to extraction (aingest_file may have set it already)
+        if doc.total_pages is None and doc.filename.endswith('.pdf') and os.path.exists(doc.filename):
+            doc.total_pages = extraction.pdf_page_count(doc.filename)
+        if chunks is None:
+            if doc.content.strip():
+                chunks = extraction.split_text(doc.content)
+            elif os.path.exists(doc.filename):
+                chunks = extraction.iter_document_chunks(doc.filename, page_count=doc.total_pages)
             else:
                 print(f"Document file not found: {doc.filename}")
                 return
         
-        if not doc.content.strip():
-            print(f"No content extracted from {doc.filename}")
-            return
-        
-        # Split text into chunks with better strategy for headers
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1500,  # Larger chunks to preserve more context
-            chunk_overlap=300,  # More overlap to maintain continuity
-            separators=["\n\n\n", "\n\n", "\n", ". ", " ", ""]  # Prioritize paragraph breaks
-        )
-        chunks = text_splitter.split_text(doc.content)
-        
-        # Create chunks with metadata
         doc.chunks = []
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():  # Only add non-empty chunks
-                chunk_id = str(uuid.uuid4())
-                doc.chunks.append({
-                    "id": chunk_id,
-                    "text": chunk,
-                    "metadata": {
-                        "doc_id": doc.id,
-                        "chunk_index": i,
-                        "filename": doc.filename
-                    }
-                })
+        doc.chunks_indexed = 0
+        doc.status = DocumentStatus.INDEXING
+        chunks = iter(chunks)
+        last_saved = None
+        while True:
+            batch = list(itertools.islice(chunks, INDEX_BATCH_CHUNKS))
+            if not batch:
+                break
+            self._commit_chunks(doc, batch)
+            # Progress is persisted at most every INDEX_PROGRESS_INTERVAL seconds; the document holds all chunks so far
+            if last_saved is None or time.monotonic() - last_saved >= INDEX_PROGRESS_INTERVAL:
+                storage.save_document(doc)
+                last_saved = time.monotonic()
+            if on_progress:
+                on_progress(doc)
         
-        if not doc.chunks:
+        doc.status = DocumentStatus.INDEXED
+        if not doc.chunks_indexed:
             print(f"No chunks created for {doc.filename}")
             return
         
-        # Add to vector store
-        texts = [c["text"] for c in doc.chunks]
-        metadatas = [c["metadata"] for c in doc.chunks]
-        
-        if self.vectorstore is None:
-            self.vectorstore = FAISS.from_texts(texts, self.embeddings, metadatas=metadatas)
-        else:
-            self.vectorstore.add_texts(texts, metadatas=metadatas)
-        
-        self.documents_indexed.add(doc.id)
+        with self._lock:
+            self.documents[doc.id]["complete"] = True
+            self.documents_indexed.add(doc.id)
+            self._dirty = True
+        if doc.total_pages:
+            doc.pages_indexed = doc.total_pages
         storage.save_document(doc)
-        print(f"Indexed document {doc.filename} with {len(doc.chunks)} chunks")
+        print(f"Indexed document {doc.filename} with {doc.chunks_indexed} chunks")
+
+    def _commit_chunks(self, doc: Document, chunks: List[dict]):
+        """Embed a batch of a document's chunks and make them searchable"""
+        texts = [chunk["text"] for chunk in chunks]
+        metadatas = [{
+            "doc_id": doc.id,
+            "chunk_index": chunk["chunk_index"],
+            "filename": doc.filename,
+            "page": chunk["page"],
+            "page_end": chunk["page_end"],
+            "start": chunk["start"],
+            "end": chunk["end"]
+        } for chunk in chunks]
+        
+        self._claim_writer()
+        # Embed the batch as one float32 matrix before taking the lock
+        vectors = self.embeddings.embed_matrix(texts)
+        with self._lock:
+            if self.vectorstore is None:
+                self.vectorstore = self._create_vectorstore()
+            self._ensure_writable()
+            # Chunk ids are rows of the chunk store, allocated in order under the lock
+            first_id = self.vectorstore.docstore.next_id
+            chunk_ids = list(range(first_id, first_id + len(chunks)))
+            self.vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=chunk_ids)
+            self.inverted_index.add_chunks(doc.id, zip(chunk_ids, texts))
+            self._index_changed()
+            
+            # "complete" stays False until the last batch, so a saved partial document is re-ingested later
+            info = self.documents.setdefault(doc.id, {"filename": doc.filename, "chunk_ids": [], "complete": False})
+            info["chunk_ids"].extend(chunk_ids)
+            self._dirty = True
+        doc.chunks_indexed += len(chunks)
+        if chunks[-1]["page_end"] is not None:
+            doc.pages_indexed = chunks[-1]["page_end"]
+
+    def file_cache_key(self, file_path: str, content_hash: Optional[str] = None) -> str:
+        """Hash file contents together with the extractor and chunker versions"""
+        if content_hash is None:
+            hasher = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(block)
+            content_hash = hasher.hexdigest()
+        return f"{content_hash}:{EXTRACTOR_VERSION}:{CHUNKER_VERSION}"
+
+    def ingest_file(self, file_path: str, content_hash: Optional[str] = None, on_progress=None) -> Document:
+        """Index a file unless an identical copy was already indexed; returns its document.
+
+        content_hash is the file's SHA-256 when the caller already computed it
+        (e.g. while streaming an upload), which saves re-reading the file.
+        on_progress(doc) is called after each committed batch (see index_document).
+        """
+        cache_key = self.file_cache_key(file_path, content_hash)
+        doc, done = self._begin_ingest(cache_key, file_path)
+        if doc:
+            return doc
+        try:
+            return self._ingest(file_path, cache_key, on_progress=on_progress)
+        finally:
+            self._end_ingest(cache_key, file_path, done)
+
+    async def aingest_file(self, file_path: str, content_hash: Optional[str] = None, on_progress=None) -> Document:
+        """ingest_file for the event loop: hashing and indexing run in threads, extraction in the process pool"""
+        cache_key = await asyncio.to_thread(self.file_cache_key, file_path, content_hash)
+        doc, done = await asyncio.to_thread(self._begin_ingest, cache_key, file_path)
+        if doc:
+            return doc
+        try:
+            page_count = await asyncio.to_thread(extraction.pdf_page_count, file_path) if file_path.endswith('.pdf') else None
+            if extraction.parallel_pdf(file_path, page_count):
+                # Long PDFs stream from a thread that fans their pages out to the process pool
+                # (a pool worker cannot), so early pages are indexed while later ones are read
+                chunks = None
+            else:
+                chunks = await run_in_process(extraction.prepare_document, file_path, page_count)
+            return await asyncio.to_thread(self._ingest, file_path, cache_key, chunks, on_progress, page_count)
+        finally:
+            self._end_ingest(cache_key, file_path, done)
+
+    def _begin_ingest(self, cache_key: str, file_path: str):
+        """Wait for ingests of the same content or path already in flight; (cached doc, None) or (None, event to set when done).
+
+        Without this, two jobs ingesting one file at once would both miss the
+        cache and index it twice under two document ids.
+        """
+        while True:
+            with self._lock:
+                cached = self.sources.get(cache_key) in self.documents_indexed
+                waiting = None if cached else self._ingesting.get(cache_key) or self._ingesting.get(file_path)
+                if not cached and waiting is None:
+                    done = self._ingesting[cache_key] = self._ingesting[file_path] = threading.Event()
+                    return None, done
+            if cached:
+                doc = self._cached_document(cache_key, file_path)
+                if doc:
+                    return doc, None
+            else:
+                waiting.wait()
+
+    def _end_ingest(self, cache_key: str, file_path: str, done: threading.Event):
+        with self._lock:
+            for key in (cache_key, file_path):
+                if self._ingesting.get(key) is done:
+                    del self._ingesting[key]
+        done.set()
+
+    def _cached_document(self, cache_key: str, file_path: str) -> Optional[Document]:
+        doc_id = self.sources.get(cache_key)
+        if doc_id not in self.documents_indexed:
+            return None
+        doc = storage.get_document(doc_id)
+        if not doc:
+            doc = Document(id=doc_id, filename=file_path, content="", chunks=[])
+            storage.save_document(doc)
+        return doc
+
+    def _ingest(self, file_path: str, cache_key: str, chunks: Optional[List[dict]] = None, on_progress=None,
+                page_count: Optional[int] = None) -> Document:
+        self._claim_writer()
+        with self._lock:
+            # A file we indexed before but whose content changed keeps its document id
+            doc_id = next((existing_id for existing_id, info in self.documents.items() if info["filename"] == file_path), None)
+            if doc_id:
+                self.remove_document(doc_id)
+            doc = Document(
+                id=doc_id or str(uuid.uuid4()),
+                filename=file_path,
+                content="",  # Text stays in the file; chunks keep page and offsets
+                chunks=[],
+                total_pages=page_count
+            )
+            self.documents[doc.id] = {"filename": file_path, "chunk_ids": [], "complete": False}
+        self.index_document(doc, chunks, on_progress)
+        with self._lock:
+            info = self.documents.get(doc.id)
+            if info is not None and not info["chunk_ids"]:
+                del self.documents[doc.id]  # Nothing was indexed
+            elif info is not None:
+                info["cache_key"] = cache_key
+                self.sources[cache_key] = doc.id
+        return doc
+
+    def remove_document(self, doc_id: str):
+        """Drop a document's vectors and chunks from the index"""
+        self._claim_writer()
+        with self._lock:
+            info = self.documents.pop(doc_id, None)
+            self.documents_indexed.discard(doc_id)
+            if not info:
+                return
+            if info.get("cache_key"):
+                self.sources.pop(info["cache_key"], None)
+            if self.vectorstore is not None and info["chunk_ids"]:
+                self._ensure_writable()
+                self.vectorstore.delete(info["chunk_ids"])
+            self.inverted_index.remove_chunks(info["chunk_ids"])
+            self._index_changed()
+            self._dirty = True
+
+    def set_keyword_mappings(self, keyword_mappings: dict):
+        """Replace the query expansion table; cached searches used the old one, so they are dropped"""
+        expander = QueryExpander(keyword_mappings)
+        with self._lock:
+            self.query_expander = expander
+            # A new version, so a search that started with the old table cannot cache under the current one
+            self._index_changed()
+            self.retrieval_cache.clear()
+
+    def _index_changed(self):
+        # Drop scope lookups and move cached searches to a new version
+        self._chunk_positions = None
+        self._scope_selectors.clear()
+        self.version += 1
+
+    def _scope_selector(self, document_ids):
+        """FAISS ID selector covering every vector of the given documents, None if they have none"""
+        key = frozenset(document_ids)
+        if key in self._scope_selectors:
+            self._scope_selectors.move_to_end(key)
+            return self._scope_selectors[key]
+        if self._chunk_positions is None:
+            self._chunk_positions = {chunk_id: position for position, chunk_id in self.vectorstore.index_to_docstore_id.items()}
+        positions = [
+            self._chunk_positions[chunk_id]
+            for doc_id in key if doc_id in self.documents
+            for chunk_id in self.documents[doc_id]["chunk_ids"] if chunk_id in self._chunk_positions
+        ]
+        selector = faiss.IDSelectorBatch(np.array(positions, dtype=np.int64)) if positions else None
+        self._scope_selectors[key] = selector
+        if len(self._scope_selectors) > 64:
+            self._scope_selectors.popitem(last=False)
+        return selector
+
+    def vector_search(self, query_vector, k=5, document_ids=None):
+        """Nearest chunks to a query vector; document_ids restricts the candidates before scoring"""
+        return self.vector_search_many(np.asarray([query_vector], dtype=np.float32), k=k, document_ids=document_ids)[0]
+
+    def vector_search_many(self, query_matrix, k=5, document_ids=None) -> List[list]:
+        """vector_search for every row of a query matrix with one batched FAISS search"""
+        query_matrix = np.asarray(query_matrix, dtype=np.float32)
+        with self._lock:
+            if self.vectorstore is None or not len(query_matrix):
+                return [[] for _ in range(len(query_matrix))]
+            params = None
+            if document_ids:
+                selector = self._scope_selector(document_ids)
+                if selector is None:
+                    return [[] for _ in range(len(query_matrix))]
+                params = faiss.SearchParameters(sel=selector)
+            _, indices = self.vectorstore.index.search(query_matrix, k, params=params)
+            chunk_ids = [
+                [self.vectorstore.index_to_docstore_id[int(position)] for position in row if position != -1]
+                for row in indices
+            ]
+        results = []
+        for row in chunk_ids:
+            chunks = [self._get_chunk(chunk_id) for chunk_id in row]
+            results.append([chunk for chunk in chunks if chunk])
+        return results
 
     def search(self, query: str, k=5, document_ids=None):
         """Search the vector store for relevant chunks with improved keyword mapping"""
-        query_lower = query.lower()
+        return self.search_many([query], k=k, document_ids=document_ids)[0]
+
+    def search_many(self, queries: List[str], k=5, document_ids=None) -> List[list]:
+        """search for many queries at once: one embedding matrix, one FAISS search and one inverted index scan.
+
+        Results are cached per query, scope and k for the current index version.
+        Embedding and scoring run outside the index lock (FAISS and BM25 take it
+        only for their own lookups), so searches run concurrently. Results are
+        cached only if the version is still the one they started from, so a
+        concurrent ingest can never pair an old version with newer results.
+        """
+        self.refresh(wait=False)
+        queries = [normalize_query(query) for query in queries]
+        with self._lock:
+            version = self.version
+            keys = [self.retrieval_cache.make_key(version, query, document_ids, k) for query in queries]
+            cached = [self.retrieval_cache.get(key) for key in keys]
+        missing = [i for i, results in enumerate(cached) if results is None]
+        if missing:
+            found = self._search_many([queries[i] for i in missing], k, document_ids)
+            with self._lock:
+                unchanged = self.version == version
+                for i, results in zip(missing, found):
+                    if unchanged:
+                        self.retrieval_cache.set(keys[i], results)
+                    cached[i] = results
+        return cached
+
+    def _search_many(self, queries: List[str], k: int, document_ids=None) -> List[list]:
+        results = [None] * len(queries)
         
         # For questions that need specific factual information, prioritize keyword search
         question_keywords = ['what is', 'what are', 'who is', 'how much', 'how many', 'where', 'when']
-        is_specific_question = any(qk in query_lower for qk in question_keywords)
-        
-        if is_specific_question:
-            # Use keyword search first for specific questions
-            return self.enhanced_keyword_search(query, k=k, document_ids=document_ids)
+        semantic = [i for i, query in enumerate(queries) if not any(qk in query.lower() for qk in question_keywords)]
         
         # First try semantic search
-        if self.vectorstore:
-            semantic_results = self.vectorstore.similarity_search(query, k=k)
-            # Filter by document_ids if provided
-            if document_ids:
-                semantic_results = [r for r in semantic_results if r.metadata.get('doc_id') in document_ids]
-            
-            # Check if semantic results are actually relevant (contain query keywords)
-            query_words = set(query.lower().split())
-            relevant_semantic = []
-            for result in semantic_results:
-                result_text = result.page_content.lower()
-                if any(word in result_text for word in query_words):
-                    relevant_semantic.append(result)
-            
-            if relevant_semantic:
-                return relevant_semantic[:k]
+        if semantic and self.vectorstore:
+            query_matrix = self.embeddings.embed_matrix([queries[i] for i in semantic])
+            # Candidates are restricted to document_ids inside FAISS, so all k hits are in scope
+            for i, semantic_results in zip(semantic, self.vector_search_many(query_matrix, k=k, document_ids=document_ids)):
+                # Check if semantic results are actually relevant (contain query keywords)
+                query_words = set(queries[i].lower().split())
+                relevant_semantic = []
+                for result in semantic_results:
+                    result_text = result.page_content.lower()
+                    if any(word in result_text for word in query_words):
+                        relevant_semantic.append(result)
+                
+                if relevant_semantic:
+                    results[i] = relevant_semantic[:k]
         
-        # Fallback to enhanced keyword search
-        return self.enhanced_keyword_search(query, k=k, document_ids=document_ids)
+        # Specific questions and semantic misses use enhanced keyword search
+        keyword = [i for i, result in enumerate(results) if result is None]
+        term_weights = [self._enhanced_term_weights(queries[i]) for i in keyword]
+        for i, keyword_results in zip(keyword, self._keyword_results_many(term_weights, k, document_ids=document_ids)):
+            results[i] = keyword_results
+        return results
     
     def enhanced_keyword_search(self, query: str, k=5, document_ids=None):
         """Enhanced keyword search with question-to-content mapping"""
-        from ..storage.memory import storage
-        
+        return self._keyword_results(self._enhanced_term_weights(query), k, document_ids=document_ids)
+
+    def _enhanced_term_weights(self, query: str) -> dict:
+        """BM25 term weights for a query, expanded with the keyword mappings"""
         query_lower = query.lower()
         
-        # Map common question patterns to likely content keywords
-        keyword_mappings = {
-            'company name': ['company', 'corporation', 'inc', 'ltd', 'group', 'incorporated'],
-            'revenue': ['revenue', 'sales', 'income', 'turnover', 'earnings'],
-            'financial statements': ['financial', 'statement', 'balance sheet', 'income statement', 'cash flow'],
-            'lawsuits': ['lawsuit', 'litigation', 'legal', 'court', 'claim'],
-            'business model': ['business model', 'operations', 'strategy', 'services'],
-            'key financial metrics': ['metrics', 'kpi', 'performance', 'ratios', 'valuation']
-        }
-        
-        # Find matching keywords for this query
-        search_keywords = set()
-        for question_pattern, content_keywords in keyword_mappings.items():
-            if question_pattern in query_lower:
-                search_keywords.update(content_keywords)
+        # Find matching keywords for this query in one pass over it
+        search_keywords = self.query_expander.expand(query_lower)
         
         # If no specific mapping found, use original query words
         if not search_keywords:
@@ -243,85 +707,38 @@ class DocumentIndexer:
         # Also include original query terms
         search_keywords.update(query_lower.split())
         
-        results = []
-        
-        # Search through indexed documents, filtered by document_ids if provided
-        docs_to_search = self.documents_indexed
-        if document_ids:
-            docs_to_search = docs_to_search.intersection(set(document_ids))
-        
-        for doc_id in docs_to_search:
-            doc = storage.get_document(doc_id)
-            if not doc or not doc.chunks:
-                continue
-                
-            for chunk_data in doc.chunks:
-                chunk_text = chunk_data["text"].lower()
-                # Count matching keywords (weighted by importance)
-                score = 0
-                matched_terms = []
-                
-                for keyword in search_keywords:
-                    if keyword in chunk_text:
-                        # Give higher weight to exact matches and company-related terms
-                        weight = 2 if keyword in ['company', 'corporation', 'inc', 'group'] else 1
-                        score += weight
-                        matched_terms.append(keyword)
-                
-                if score > 0:
-                    # Create a mock result object similar to FAISS results
-                    class MockResult:
-                        def __init__(self, page_content, metadata, score):
-                            self.page_content = page_content
-                            self.metadata = metadata
-                            self.score = score
-                    
-                    results.append(MockResult(
-                        page_content=chunk_data["text"],
-                        metadata=chunk_data["metadata"],
-                        score=score
-                    ))
+        # Weight company-related terms higher
+        term_weights = {}
+        for keyword in search_keywords:
+            weight = 2 if keyword in ['company', 'corporation', 'inc', 'group'] else 1
+            for term in tokenize(keyword):
+                term_weights[term] = max(term_weights.get(term, 0), weight)
         
-        # Sort by score (relevance) and return top k
-        results.sort(key=lambda x: x.score, reverse=True)
-        return results[:k]
+        return term_weights
 
     def keyword_search(self, query: str, k=5, document_ids=None):
         """Simple keyword-based search as fallback"""
-        from ..storage.memory import storage
-        
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
-        results = []
-        
-        # Search through indexed documents, filtered by document_ids if provided
-        docs_to_search = self.documents_indexed
-        if document_ids:
-            docs_to_search = docs_to_search.intersection(set(document_ids))
-        
-        for doc_id in docs_to_search:
-            doc = storage.get_document(doc_id)
-            if not doc or not doc.chunks:
-                continue
-                
-            for chunk_data in doc.chunks:
-                chunk_text = chunk_data["text"].lower()
-                # Count matching words
-                matching_words = sum(1 for word in query_words if word in chunk_text)
-                if matching_words > 0:
-                    # Create a mock result object similar to FAISS results
-                    class MockResult:
-                        def __init__(self, page_content, metadata):
-                            self.page_content = page_content
-                            self.metadata = metadata
-                    
-                    results.append(MockResult(
-                        page_content=chunk_data["text"],
-                        metadata=chunk_data["metadata"]
-                    ))
-        
-        # Sort by relevance (simple word count) and return top k
-        results.sort(key=lambda x: len([w for w in query_words if w in x.page_content.lower()]), reverse=True)
-        return results[:k]
+        term_weights = {term: 1 for term in tokenize(query)}
+        return self._keyword_results(term_weights, k, document_ids=document_ids)
+
+class _LazyIndexer:
+    """Stands in for the shared DocumentIndexer, which is created (loading the persisted index) on first use"""
+
+    def __init__(self):
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get(self) -> DocumentIndexer:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, "_instance", DocumentIndexer())
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
 
-indexer = DocumentIndexer()
\ No newline at end of file
+indexer = _LazyIndexer()
\ No newline at end of file
@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+import math
+import os
+import pickle
+import re
+import sys
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into alphanumeric terms"""
+    return _TOKEN_RE.findall(text.lower())
+
+class InvertedIndex:
+    """Postings lists (term -> chunk_id -> term frequency) with BM25 scoring.
+
+    Query cost is proportional to the postings of the query terms rather than
+    to the number of chunks in the corpus. Each chunk's distinct terms are
+    kept too, so removing a chunk only touches its own postings.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.chunk_lengths: Dict[int, int] = {}
+        self.chunk_docs: Dict[int, str] = {}
+        self.chunk_terms: Dict[int, Tuple[str, ...]] = {}
+        self.total_length = 0
+
+    def add_chunks(self, doc_id: str, chunks: Iterable[Tuple[int, str]]):
+        """Index (chunk_id, text) pairs belonging to a document"""
+        for chunk_id, text in chunks:
+            terms = tokenize(text)
+            frequencies: Dict[str, int] = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, tf in frequencies.items():
+                self.postings.setdefault(term, {})[chunk_id] = tf
+            self.chunk_lengths[chunk_id] = len(terms)
+            self.chunk_docs[chunk_id] = doc_id
+            # Interned so every chunk shares one string object per term
+            self.chunk_terms[chunk_id] = tuple(sys.intern(term) for term in frequencies)
+            self.total_length += len(terms)
+
+    def remove_chunks(self, chunk_ids: Iterable[int]):
+        """Remove chunks from the index, visiting only the postings of their terms"""
+        for chunk_id in chunk_ids:
+            if chunk_id not in self.chunk_lengths:
+                continue
+            self.total_length -= self.chunk_lengths.pop(chunk_id)
+            self.chunk_docs.pop(chunk_id, None)
+            for term in self.chunk_terms.pop(chunk_id, ()):
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, term_weights: Dict[str, float], k: int = 5, document_ids=None) -> List[Tuple[int, float]]:
+        """Return the top-k (chunk_id, score) pairs for weighted query terms"""
+        return self.search_many([term_weights], k=k, document_ids=document_ids)[0]
+
+    def search_many(self, queries: List[Dict[str, float]], k: int = 5, document_ids=None) -> List[List[Tuple[int, float]]]:
+        """search for several queries in one pass: each term's postings are scored once for every query using it"""
+        if not self.chunk_lengths:
+            return [[] for _ in queries]
+        allowed_docs = set(document_ids) if document_ids else None
+        total_chunks = len(self.chunk_lengths)
+        average_length = self.total_length / total_chunks or 1.0
+        # term -> [(query number, weight)], in first-use order
+        term_queries: Dict[str, List[Tuple[int, float]]] = {}
+        for n, term_weights in enumerate(queries):
+            for term, weight in term_weights.items():
+                term_queries.setdefault(term, []).append((n, weight))
+        scores: List[Dict[int, float]] = [{} for _ in queries]
+        for term, users in term_queries.items():
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+            for chunk_id, tf in posting.items():
+                if allowed_docs is not None and self.chunk_docs[chunk_id] not in allowed_docs:
+                    continue
+                length_norm = self.k1 * (1 - self.b + self.b * self.chunk_lengths[chunk_id] / average_length)
+                term_score = idf * tf * (self.k1 + 1) / (tf + length_norm)
+                for n, weight in users:
+                    scores[n][chunk_id] = scores[n].get(chunk_id, 0.0) + weight * term_score
+        return [heapq.nlargest(k, query_scores.items(), key=lambda item: item[1]) for query_scores in scores]
+
+    def dumps(self, generation: int = 0) -> bytes:
+        """The postings pickled, tagged with the index generation they belong to"""
+        return pickle.dumps({
+            "generation": generation,
+            "postings": self.postings,
+            "chunk_lengths": self.chunk_lengths,
+            "chunk_docs": self.chunk_docs,
+            "chunk_terms": self.chunk_terms,
+            "total_length": self.total_length
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def save(self, path: str, generation: int = 0):
+        with open(path, 'wb') as f:
+            f.write(self.dumps(generation))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @classmethod
+    def load(cls, path: str, generation: Optional[int] = None) -> "InvertedIndex":
+        """Unpickle saved postings; with a generation, refuse a file written for another one"""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if generation is not None and state.get("generation") != generation:
+            raise ValueError(f"{path} belongs to index generation {state.get('generation')}, expected {generation}")
+        index = cls()
+        index.postings = state["postings"]
+        index.chunk_lengths = state["chunk_lengths"]
+        index.chunk_docs = state["chunk_docs"]
+        index.total_length = state["total_length"]
+        index.chunk_terms = state.get("chunk_terms")
+        if index.chunk_terms is None:
+            # Saved before chunk terms were kept; rebuild them from the postings once
+            chunk_terms: Dict[int, List[str]] = {}
+            for term, posting in index.postings.items():
+                for chunk_id in posting:
+                    chunk_terms.setdefault(chunk_id, []).append(term)
+            index.chunk_terms = {chunk_id: tuple(terms) for chunk_id, terms in chunk_terms.items()}
+        return index
@@ -0,0 +1,106 @@
+"""Query expansion: question patterns mapped to the content keywords they should also search for.
+
+The table defaults to DEFAULT_KEYWORD_MAPPINGS and can be replaced with a
+JSON file ({"pattern": ["keyword", ...]}) named by KEYWORD_MAPPINGS_PATH.
+Patterns are found in a query with one Aho-Corasick pass, so a large table
+costs no more per query than a small one.
+"""
+import json
+import os
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+KEYWORD_MAPPINGS_PATH = os.getenv("KEYWORD_MAPPINGS_PATH", "")  # JSON file replacing DEFAULT_KEYWORD_MAPPINGS
+
+# Map common question patterns to likely content keywords
+DEFAULT_KEYWORD_MAPPINGS = {
+    'company name': ['company', 'corporation', 'inc', 'ltd', 'group', 'incorporated'],
+    'revenue': ['revenue', 'sales', 'income', 'turnover', 'earnings'],
+    'financial statements': ['financial', 'statement', 'balance sheet', 'income statement', 'cash flow'],
+    'lawsuits': ['lawsuit', 'litigation', 'legal', 'court', 'claim'],
+    'business model': ['business model', 'operations', 'strategy', 'services'],
+    'key financial metrics': ['metrics', 'kpi', 'performance', 'ratios', 'valuation']
+}
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed set of keywords.
+
+    counts() walks the text once and reports every occurrence of every
+    keyword, overlapping ones included, with the same substring semantics as
+    `keyword in text`. Build it once per keyword set and reuse it.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in set(keywords):
+            if keyword:
+                self._add(keyword)
+        self._link()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(keyword)
+
+    def _link(self):
+        # Breadth-first, so a state's failure link is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0) if state else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Every keyword found in the text, with its number of occurrences"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Dict[str, int] = {}
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                found[keyword] = found.get(keyword, 0) + 1
+        return found
+
+def load_keyword_mappings(path: str = KEYWORD_MAPPINGS_PATH) -> Dict[str, List[str]]:
+    """The expansion table from a JSON file, or the defaults if no path is set or it cannot be read"""
+    if not path:
+        return dict(DEFAULT_KEYWORD_MAPPINGS)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Failed to load keyword mappings from {path}, using defaults: {e}")
+        return dict(DEFAULT_KEYWORD_MAPPINGS)
+
+class QueryExpander:
+    """Expands queries with an expansion table, compiled into a KeywordMatcher once"""
+
+    def __init__(self, mappings: Optional[Dict[str, List[str]]] = None):
+        if mappings is None:
+            mappings = load_keyword_mappings()
+        self.mappings = {pattern.lower(): [keyword.lower() for keyword in keywords] for pattern, keywords in mappings.items()}
+        self.matcher = KeywordMatcher(self.mappings)
+
+    def expand(self, query: str) -> Set[str]:
+        """Content keywords of every pattern found in the (lowercased) query"""
+        keywords = set()
+        for pattern in self.matcher.counts(query.lower()):
+            keywords.update(self.mappings[pattern])
+        return keywords
@@ -0,0 +1,62 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "2048"))  # cached searches (0 = disabled)
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace; case is kept because embeddings may be case-sensitive"""
+    return " ".join(query.split())
+
+class RetrievalCache:
+    """In-memory LRU of search results keyed by index version, query, scope and k.
+
+    The indexer bumps its version whenever chunks are added or removed, so
+    entries computed against an older index never match again and age out of
+    the LRU instead of being served stale.
+    """
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(version: int, query: str, document_ids, k: int) -> tuple:
+        return version, normalize_query(query), frozenset(document_ids) if document_ids else None, k
+
+    def get(self, key: tuple) -> Optional[List]:
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def set(self, key: tuple, results: List):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = list(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
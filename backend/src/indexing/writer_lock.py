@@ -0,0 +1,38 @@
+"""Single-writer lock for a persisted index directory.
+
+Every process builds its own DocumentIndexer over INDEX_DIR and a save
+replaces the whole index, so only one process may write it. That process
+holds an exclusive flock on index_dir/writer.lock for the rest of its life
+(the OS releases it when the process exits); the others only read, and
+pick up new generations through DocumentIndexer.refresh().
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks (Windows): run a single process that writes the index
+    fcntl = None
+
+_held: Dict[str, int] = {}  # absolute index dir -> descriptor of its locked writer.lock
+_held_lock = threading.Lock()
+
+def acquire_index_writer(index_dir: Optional[str]) -> bool:
+    """Whether this process may write the index in index_dir, taking the lock if it is free"""
+    if not index_dir or fcntl is None:
+        return True
+    path = os.path.abspath(index_dir)
+    with _held_lock:
+        if path in _held:
+            return True
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, "writer.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        _held[path] = fd
+        print(f"Process {os.getpid()} is now the index writer for {path}")
+        return True
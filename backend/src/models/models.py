@@ -8,6 +8,10 @@ class ProjectStatus(str, Enum):
     READY = "READY"
     OUTDATED = "OUTDATED"
 
+class DocumentStatus(str, Enum):
+    INDEXING = "INDEXING"  # partially indexed; committed chunks are already searchable
+    INDEXED = "INDEXED"
+
 class AnswerStatus(str, Enum):
     GENERATED = "GENERATED"
     CONFIRMED = "CONFIRMED"
@@ -47,7 +51,11 @@ class Document(BaseModel):
     id: str
     filename: str
     content: str
-    chunks: List[Dict[str, Any]]  # For indexing
+    chunks: List[Dict[str, Any]] = []  # Unused by the indexer: chunk text and metadata live in its chunk store
+    status: DocumentStatus = DocumentStatus.INDEXED
+    chunks_indexed: int = 0
+    pages_indexed: Optional[int] = None
+    total_pages: Optional[int] = None  # PDFs only
 
 class Project(BaseModel):
     id: str
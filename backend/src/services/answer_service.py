@@ -1,58 +1,34 @@
-from ..models import Answer, AnswerStatus, Citation, ProjectStatus
+from ..models import Answer, AnswerStatus, Citation, Project, ProjectStatus, Question
 from ..indexing.indexer import indexer
 from ..storage.memory import storage
+from .llm_clients import get_client
+from .response_cache import response_cache
 import uuid
-import requests
 import json
 import os
-from typing import List
+import re
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import time
 
 load_dotenv()
 
 # AI Service Configuration
-AI_PROVIDER = os.getenv("AI_PROVIDER", "ollama")  # "ollama", "openrouter", "grok", "together", "zai"
+# Provider endpoints, keys and pool settings live in llm_clients.py
+AI_PROVIDER = os.getenv("AI_PROVIDER", "ollama")  # "ollama", "openrouter", "grok", "together", "zai", "stub"
+PROMPT_VERSION = "2"  # Part of the response cache key; bump when build_prompt changes
 
-# Ollama configuration
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
-
-# Cloud AI configurations
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-GROK_API_KEY = os.getenv("GROK_API_KEY")
-TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY")
-ZAI_API_KEY = os.getenv("ZAI_API_KEY")
-
-def generate_answer(project_id: str, question_text: str) -> Answer:
-    """Generate an AI-powered answer with citations and confidence score"""
-    
-    # Get the project to access its documents
-    project = storage.get_project(project_id)
-    if not project:
-        return Answer(
-            id=str(uuid.uuid4()),
-            question_id="",
-            answer_text="Project not found.",
-            citations=[],
-            confidence_score=0.0,
-            status=AnswerStatus.MISSING_DATA
-        )
-    
-    # Search for relevant document chunks within the project's documents
-    document_ids = project.documents if project.documents else None
-    relevant_chunks = indexer.search(question_text, k=3, document_ids=document_ids)
-    
+def build_prompt(question_text: str, relevant_chunks) -> str:
+    """Build the structured answer prompt from the retrieved chunks"""
     # Prepare context from relevant chunks
     if relevant_chunks:
-        context = "\n\n".join([chunk.page_content for chunk in relevant_chunks])
+        context = "\n\n".join([f"[{source_label(chunk)}]\n{chunk.page_content}" for chunk in relevant_chunks])
     else:
         context = "No relevant document excerpts found for this question."
     
-    # Create prompt for OpenRouter (structured format)
-    prompt = f"""Based on the following document excerpts, answer the question: "{question_text}"
+    # Structured format shared by all providers
+    return f"""Based on the following document excerpts, answer the question: "{question_text}"
 
 Document excerpts:
 {context}
@@ -70,182 +46,34 @@ CONFIDENCE: 0.9
 
 Do NOT include confidence scores or citations within the ANSWER section.
 Do NOT use markdown formatting like **bold** in your response."""
-    
+
+def source_label(chunk) -> str:
+    """Human-readable source of a chunk, e.g. "report.pdf, Page 12" """
+    metadata = chunk.metadata or {}
+    label = os.path.basename(metadata.get("filename", "")) or "Document"
+    page, page_end = metadata.get("page"), metadata.get("page_end")
+    if page and page_end and page_end != page:
+        return f"{label}, Pages {page}-{page_end}"
+    if page:
+        return f"{label}, Page {page}"
+    return label
+
+def cited_chunk(citation_text: str, relevant_chunks, position: int):
+    """The retrieved chunk a citation refers to: by page number if it names one, otherwise by position"""
+    if not relevant_chunks:
+        return None
+    page_match = re.search(r'pages?\s*(\d+)', citation_text, re.IGNORECASE)
+    if page_match:
+        page = int(page_match.group(1))
+        for chunk in relevant_chunks:
+            first, last = chunk.metadata.get("page"), chunk.metadata.get("page_end")
+            if first and first <= page <= (last or first):
+                return chunk
+    return relevant_chunks[min(position, len(relevant_chunks) - 1)]
+
+def parse_ai_response(ai_response: str, question_text: str, relevant_chunks=None) -> Answer:
+    """Turn a raw model response into an Answer with citations and confidence"""
     try:
-        if AI_PROVIDER == "ollama":
-            # Call Ollama API
-            response = requests.post(
-                f"{OLLAMA_BASE_URL}/api/chat",
-                json={
-                    "model": OLLAMA_MODEL,
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided documents. Always cite your sources and provide confidence scores."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.1,
-                        "num_predict": 500
-                    }
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result["message"]["content"]
-                print(f"✅ Ollama API success: '{ai_response[:100] if ai_response else 'None'}...'")
-                if not ai_response:
-                    ai_response = "I apologize, but I couldn't generate a response for this question."
-            else:
-                print(f"❌ Ollama API error: {response.status_code} - {response.text}")
-                raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
-                
-        elif AI_PROVIDER == "openrouter":
-            # Call OpenRouter API using requests
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "stepfun/step-3.5-flash:free",
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided documents. Always cite your sources and provide confidence scores."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 500
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result["choices"][0]["message"]["content"]
-                print(f"✅ OpenRouter API success: '{ai_response[:100] if ai_response else 'None'}...'")
-                if not ai_response:
-                    ai_response = "I apologize, but I couldn't generate a response for this question."
-            else:
-                print(f"❌ OpenRouter API error: {response.status_code} - {response.text}")
-                raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
-            
-        elif AI_PROVIDER == "grok":
-            # Call Grok API (xAI)
-            response = requests.post(
-                "https://api.x.ai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {GROK_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "grok-beta",
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided documents. Always cite your sources and provide confidence scores."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 500
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result["choices"][0]["message"]["content"]
-            else:
-                raise Exception(f"Grok API error: {response.status_code} - {response.text}")
-                
-        elif AI_PROVIDER == "together":
-            # Call Together AI
-            response = requests.post(
-                "https://api.together.xyz/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {TOGETHER_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "meta-llama/Llama-2-70b-chat-hf",
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided documents. Always cite your sources and provide confidence scores."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 500
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result["choices"][0]["message"]["content"]
-            else:
-                raise Exception(f"Together AI error: {response.status_code} - {response.text}")
-                
-        elif AI_PROVIDER == "zai":
-            # Call Z.AI API (using free GLM-4.7-Flash model) with retry logic
-            max_retries = 3
-            retry_delay = 5  # seconds
-            
-            for attempt in range(max_retries):
-                try:
-                    response = requests.post(
-                        "https://open.bigmodel.cn/api/paas/v4/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {ZAI_API_KEY}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": "glm-4.5",  # GLM-4.5 Flash model
-                            "messages": [
-                                {"role": "system", "content": "You are a helpful assistant that answers questions based on provided documents. Always cite your sources and provide confidence scores."},
-                                {"role": "user", "content": prompt}
-                            ],
-                            "temperature": 0.1,
-                            "max_tokens": 500
-                        },
-                        timeout=15
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        ai_response = result["choices"][0]["message"]["content"]
-                        print(f"✅ Z.AI API success: '{ai_response}' (length: {len(ai_response)})")
-                        if not ai_response or ai_response.strip() == "":
-                            print("⚠️ Empty response from Z.AI, using fallback")
-                            ai_response = f"Based on the available documents, I cannot provide a specific answer to: {question_text[:50]}..."
-                        break  # Success, exit retry loop
-                    elif response.status_code == 429:
-                        # Rate limit exceeded, wait and retry
-                        if attempt < max_retries - 1:
-                            print(f"Z.AI rate limit hit, waiting {retry_delay} seconds before retry {attempt + 1}/{max_retries}")
-                            import time
-                            time.sleep(retry_delay)
-                            retry_delay *= 2  # Exponential backoff
-                            continue
-                        else:
-                            raise Exception(f"Z.AI API rate limit exceeded after {max_retries} attempts")
-                    else:
-                        print(f"❌ Z.AI API error: {response.status_code} - {response.text}")
-                        raise Exception(f"Z.AI API error: {response.status_code} - {response.text}")
-                        
-                except requests.exceptions.Timeout:
-                    if attempt < max_retries - 1:
-                        print(f"Z.AI timeout, retrying {attempt + 1}/{max_retries}")
-                        import time
-                        time.sleep(2)
-                        continue
-                    else:
-                        raise Exception(f"Z.AI API timeout after {max_retries} attempts")
-            
-            # If we get here without breaking, it means all retries failed
-            else:
-                raise Exception(f"Z.AI API failed after {max_retries} attempts")
-        
-        else:
-            raise Exception(f"Unknown AI provider: {AI_PROVIDER}")
-        
         print(f"AI Response from {AI_PROVIDER}: {ai_response[:100]}...")  # Debug: print the raw response
         
         # Parse the response - more robust parsing
@@ -277,7 +105,6 @@ Do NOT use markdown formatting like **bold** in your response."""
                 confidence_str = line.replace('CONFIDENCE:', '').strip()
                 try:
                     # Extract number from confidence string
-                    import re
                     confidence_match = re.search(r'(\d*\.?\d+)', confidence_str)
                     if confidence_match:
                         extracted_confidence = float(confidence_match.group(1))
@@ -296,12 +123,14 @@ Do NOT use markdown formatting like **bold** in your response."""
             answer_text = extracted_answer.strip()
 
         if extracted_citations:
-            for citation_text in extracted_citations:
+            for position, citation_text in enumerate(extracted_citations):
+                chunk = cited_chunk(citation_text, relevant_chunks, position)
+                metadata = chunk.metadata if chunk else {}
                 citations.append(Citation(
-                    document_id="doc1",
-                    chunk_id="chunk1",
+                    document_id=metadata.get("doc_id", "doc1"),
+                    chunk_id=str(metadata.get("chunk_id", "chunk1")),
                     text=citation_text,
-                    page=None
+                    page=metadata.get("page")
                 ))
 
         if extracted_confidence is not None:
@@ -309,7 +138,6 @@ Do NOT use markdown formatting like **bold** in your response."""
 
         # Fallback: Try to extract confidence from text if not found in structured format
         if extracted_confidence is None:
-            import re
             confidence_patterns = [
                 r'confidence[:\s]*score[:\s]*(\d+(?:\.\d+)?)%?',  # confidence score: 85%
                 r'confidence[:\s]*(\d+(?:\.\d+)?)%?',  # confidence: 0.8
@@ -354,13 +182,8 @@ Do NOT use markdown formatting like **bold** in your response."""
         answer_text = answer_text.strip()
         
     except Exception as e:
-        print(f"❌ Error calling {AI_PROVIDER}: {str(e)}")
-        print(f"❌ Exception type: {type(e).__name__}")
-        # For production, provide a helpful error message instead of mock answers
-        answer_text = f"I apologize, but I encountered an error while processing this question: {question_text[:50]}... The AI service may be temporarily unavailable. Please try again later."
-        citations = []
-        confidence_score = 0.0
-        status = AnswerStatus.MISSING_DATA
+        print(f"❌ Error parsing {AI_PROVIDER} response: {str(e)}")
+        return provider_error_answer(question_text)
     
     # Check if the answer indicates missing data
     if "no relevant information" in answer_text.lower() or confidence_score < 0.3:
@@ -379,7 +202,180 @@ Do NOT use markdown formatting like **bold** in your response."""
     )
     return answer
 
-def generate_all_answers(project_id: str, progress_callback=None) -> List[Answer]:
+def provider_error_answer(question_text: str) -> Answer:
+    """Answer returned when the AI provider could not be reached"""
+    # For production, provide a helpful error message instead of mock answers
+    return Answer(
+        id=str(uuid.uuid4()),
+        question_id="",  # Will be set by caller
+        answer_text=f"I apologize, but I encountered an error while processing this question: {question_text[:50]}... The AI service may be temporarily unavailable. Please try again later.",
+        citations=[],
+        confidence_score=0.0,
+        status=AnswerStatus.MISSING_DATA
+    )
+
+def empty_response_fallback(ai_response: str, question_text: str) -> str:
+    """Replace an empty model response with a readable fallback"""
+    if ai_response and ai_response.strip():
+        return ai_response
+    print(f"⚠️ Empty response from {AI_PROVIDER}, using fallback")
+    if AI_PROVIDER == "zai":
+        return f"Based on the available documents, I cannot provide a specific answer to: {question_text[:50]}..."
+    return "I apologize, but I couldn't generate a response for this question."
+
+def project_not_found_answer() -> Answer:
+    return Answer(
+        id=str(uuid.uuid4()),
+        question_id="",
+        answer_text="Project not found.",
+        citations=[],
+        confidence_score=0.0,
+        status=AnswerStatus.MISSING_DATA
+    )
+
+def retrieve_context(project_id: str, question_text: str) -> Optional[List]:
+    """Retrieve the relevant chunks from the project's documents; None if the project is missing"""
+    # Get the project to access its documents
+    project = storage.get_project(project_id)
+    if not project:
+        return None
+    
+    # Search for relevant document chunks within the project's documents
+    document_ids = project.documents if project.documents else None
+    return indexer.search(question_text, k=3, document_ids=document_ids)
+
+def retrieve_contexts(project_id: str, questions: List[Question]) -> Optional[Dict[str, List]]:
+    """retrieve_context for a whole questionnaire in one batched search; question id -> chunks"""
+    project = storage.get_project(project_id)
+    if not project:
+        return None
+    document_ids = project.documents if project.documents else None
+    results = indexer.search_many([question.text for question in questions], k=3, document_ids=document_ids)
+    return {question.id: chunks for question, chunks in zip(questions, results)}
+
+def response_cache_key(client, question_text: str, relevant_chunks: List) -> Optional[str]:
+    """Cache key for a question and the exact context it was answered from"""
+    if response_cache is None:
+        return None
+    return response_cache.make_key(
+        client.name, client.model, {**client.cache_params(), "prompt_version": PROMPT_VERSION}, question_text,
+        [chunk.page_content for chunk in relevant_chunks]
+    )
+
+def generate_answer(project_id: str, question_text: str, use_cache: bool = True) -> Answer:
+    """Generate an AI-powered answer with citations and confidence score"""
+    relevant_chunks = retrieve_context(project_id, question_text)
+    if relevant_chunks is None:
+        return project_not_found_answer()
+    
+    client = get_client(AI_PROVIDER)
+    cache_key = response_cache_key(client, question_text, relevant_chunks)
+    if cache_key and use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return parse_ai_response(cached, question_text, relevant_chunks)
+    
+    try:
+        # Pooled, keep-alive client for the configured provider
+        ai_response = client.chat_sync(build_prompt(question_text, relevant_chunks))
+        print(f"✅ {AI_PROVIDER} API success: '{ai_response[:100] if ai_response else 'None'}...'")
+        if cache_key and ai_response and ai_response.strip():
+            response_cache.set(cache_key, ai_response)
+        ai_response = empty_response_fallback(ai_response, question_text)
+    except Exception as e:
+        print(f"❌ Error calling {AI_PROVIDER}: {str(e)}")
+        print(f"❌ Exception type: {type(e).__name__}")
+        return provider_error_answer(question_text)
+    
+    return parse_ai_response(ai_response, question_text, relevant_chunks)
+
+async def agenerate_answer(project_id: str, question_text: str, use_cache: bool = True, relevant_chunks: Optional[List] = None) -> Answer:
+    """Async generate_answer: same retrieval, caching and parsing, non-blocking provider call.
+
+    relevant_chunks skips retrieval when the context was prefetched (see retrieve_contexts).
+    """
+    if relevant_chunks is None:
+        relevant_chunks = retrieve_context(project_id, question_text)
+    if relevant_chunks is None:
+        return project_not_found_answer()
+    
+    client = get_client(AI_PROVIDER)
+    cache_key = response_cache_key(client, question_text, relevant_chunks)
+    if cache_key and use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return parse_ai_response(cached, question_text, relevant_chunks)
+    
+    try:
+        ai_response = await client.chat(build_prompt(question_text, relevant_chunks))
+        print(f"✅ {AI_PROVIDER} API success: '{ai_response[:100] if ai_response else 'None'}...'")
+        if cache_key and ai_response and ai_response.strip():
+            response_cache.set(cache_key, ai_response)
+        ai_response = empty_response_fallback(ai_response, question_text)
+    except Exception as e:
+        print(f"❌ Error calling {AI_PROVIDER}: {str(e)}")
+        print(f"❌ Exception type: {type(e).__name__}")
+        return provider_error_answer(question_text)
+    
+    return parse_ai_response(ai_response, question_text, relevant_chunks)
+
+async def answer_question(project_id: str, question: Question, use_cache: bool = True, relevant_chunks: Optional[List] = None) -> Answer:
+    """agenerate_answer for a project question; never raises"""
+    try:
+        answer = await agenerate_answer(project_id, question.text, use_cache, relevant_chunks)
+    except Exception as e:
+        print(f"Failed to generate answer for question: {question.text[:50]}... Error: {e}")
+        answer = Answer(
+            id=str(uuid.uuid4()),
+            question_id=question.id,
+            answer_text=f"Unable to generate answer due to API limitations. Question: {question.text}",
+            citations=[],
+            confidence_score=0.0,
+            status=AnswerStatus.MISSING_DATA
+        )
+    answer.question_id = question.id
+    return answer
+
+async def answer_questions(project_id: str, questions: List[Question], concurrency: int = None, use_cache: bool = True):
+    """Answer questions with bounded concurrency, yielding (question, answer) in completion order.
+
+    Retrieval for all questions is prefetched with one batched search, and
+    every question is then queued for answer_queued_questions.
+    """
+    contexts = await asyncio.to_thread(retrieve_contexts, project_id, questions) or {}
+    ready = asyncio.Queue()
+    for question in questions:
+        ready.put_nowait((question, contexts.get(question.id)))
+    async for question, answer in answer_queued_questions(project_id, ready, len(questions), concurrency, use_cache):
+        yield question, answer
+
+async def answer_queued_questions(project_id: str, ready: asyncio.Queue, total: int, concurrency: int = None, use_cache: bool = True):
+    """Answer (question, chunks) items as they arrive on ready, yielding (question, answer) in completion order.
+
+    A fixed set of workers pulls from the queue, so a slot is refilled as soon
+    as any question finishes instead of waiting for the slowest in a batch.
+    Items may be queued while answering is under way (see pipeline.py); the
+    generator ends after total answers.
+    """
+    client = get_client(AI_PROVIDER)
+    concurrency = max(1, min(concurrency or client.concurrency, total or 1))
+    finished = asyncio.Queue()
+    
+    async def worker():
+        while True:
+            question, chunks = await ready.get()
+            answer = await answer_question(project_id, question, use_cache, chunks)
+            await finished.put((question, answer))
+    
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for _ in range(total):
+            yield await finished.get()
+    finally:
+        for task in workers:
+            task.cancel()
+
+async def agenerate_all_answers(project_id: str, progress_callback=None, use_cache: bool = True) -> List[Answer]:
     """Generate answers for all questions in a project with progress tracking"""
     project = storage.get_project(project_id)
     if not project:
@@ -387,66 +383,18 @@ def generate_all_answers(project_id: str, progress_callback=None) -> List[Answer
     
     answers = []
     total_questions = len(project.questions)
+    start_time = time.time()
     
-    # Check if using Z.AI (which has low concurrency limits)
-    ai_provider = os.getenv("AI_PROVIDER", "ollama").lower()
-    use_sequential = ai_provider == "zai"  # Z.AI has strict concurrency limits
-    
-    if use_sequential:
-        # Process questions sequentially for Z.AI to avoid rate limits
-        batch_size = 1
-        print("Using sequential processing for Z.AI to avoid concurrency limits")
-    else:
-        # Process in batches for other providers
-        batch_size = 3
-    
-    for i in range(0, total_questions, batch_size):
-        batch_questions = project.questions[i:i + batch_size]
-        batch_answers = []
-        
-        if use_sequential:
-            # Process sequentially for Z.AI with delays to avoid rate limits
-            for question in batch_questions:
-                try:
-                    answer = generate_answer(project_id, question.text)
-                    answer.question_id = question.id
-                    batch_answers.append(answer)
-                    # Add delay between requests to avoid rate limiting
-                    import time
-                    time.sleep(2)  # 2 second delay between requests
-                except Exception as e:
-                    print(f"Failed to generate answer for question: {question.text[:50]}... Error: {e}")
-                    # Create a fallback answer
-                    answer = Answer(
-                        id=str(uuid.uuid4()),
-                        question_id=question.id,
-                        answer_text=f"Unable to generate answer due to API limitations. Question: {question.text}",
-                        citations=[],
-                        confidence_score=0.0,
-                        status=AnswerStatus.MISSING_DATA
-                    )
-                    batch_answers.append(answer)
-        else:
-            # Process batch concurrently for other providers
-            with ThreadPoolExecutor(max_workers=batch_size) as executor:
-                futures = []
-                for question in batch_questions:
-                    future = executor.submit(generate_answer, project_id, question.text)
-                    futures.append((future, question))
-                
-                for future, question in futures:
-                    answer = future.result()
-                    answer.question_id = question.id
-                    batch_answers.append(answer)
-        
-        answers.extend(batch_answers)
+    async for question, answer in answer_questions(project_id, project.questions, use_cache=use_cache):
+        answers.append(answer)
         
         # Update progress
-        current_count = min(i + batch_size, total_questions)
+        current_count = len(answers)
         if progress_callback:
             progress = int((current_count / total_questions) * 100)
-            estimated_time_remaining = (total_questions - current_count) * 2  # Rough estimate: 2 seconds per question with batching
-            current_question_text = batch_questions[0].text[:50] + "..." if len(batch_questions[0].text) > 50 else batch_questions[0].text
+            elapsed = time.time() - start_time
+            estimated_time_remaining = int(elapsed / current_count * (total_questions - current_count))
+            current_question_text = question.text[:50] + "..." if len(question.text) > 50 else question.text
             progress_callback({
                 "current": current_count,
                 "total": total_questions,
@@ -455,14 +403,35 @@ def generate_all_answers(project_id: str, progress_callback=None) -> List[Answer
                 "current_question": f"Processing: {current_question_text}"
             })
     
-    # Update project with answers
-    project.answers = answers
-    project.status = ProjectStatus.READY
-    storage.save_project(project)
+    # Update project with answers, kept in questionnaire order
+    question_order = {q.id: q.order for q in project.questions}
+    answers.sort(key=lambda a: question_order.get(a.question_id, 0))
+    # Applied to the stored project so documents added while answering are not overwritten
+    def finish(project: Project):
+        project.answers = answers
+        project.status = ProjectStatus.READY
+    storage.update_project(project_id, finish)
     
     return answers
 
-def stream_answers(project_id: str):
+def generate_all_answers(project_id: str, progress_callback=None, use_cache: bool = True) -> List[Answer]:
+    """Blocking wrapper around agenerate_all_answers for scripts"""
+    return asyncio.run(agenerate_all_answers(project_id, progress_callback, use_cache))
+
+def answer_event(question: Question, answer: Answer) -> str:
+    """Server-Sent Event carrying one answer"""
+    answer_data = {
+        "type": "answer",
+        "question_id": question.id,
+        "question_text": question.text,
+        "answer_text": answer.answer_text,
+        "citations": [c.dict() for c in answer.citations],
+        "confidence_score": answer.confidence_score,
+        "status": answer.status.value
+    }
+    return f"data: {json.dumps(answer_data)}\n\n"
+
+async def stream_answers(project_id: str, use_cache: bool = True):
     """Stream answers as they are generated in real-time using Server-Sent Events"""
     project = storage.get_project(project_id)
     if not project:
@@ -475,120 +444,12 @@ def stream_answers(project_id: str):
     # Send initial progress update
     yield f"data: {json.dumps({'type': 'progress', 'current': 0, 'total': total_questions, 'message': 'Starting AI analysis...'})}\n\n"
     
-    # Check if using Z.AI (which has low concurrency limits)
-    ai_provider = os.getenv("AI_PROVIDER", "ollama").lower()
-    use_sequential = ai_provider == "zai"
-    
-    if use_sequential:
-        batch_size = 1
-    else:
-        batch_size = 3
-    
-    for i in range(0, total_questions, batch_size):
-        batch_questions = project.questions[i:i + batch_size]
-        batch_answers = []
-        
-        if use_sequential:
-            # Process sequentially for Z.AI with delays
-            for question in batch_questions:
-                try:
-                    answer = generate_answer(project_id, question.text)
-                    answer.question_id = question.id
-                    batch_answers.append(answer)
-                    
-                    # Send this answer immediately
-                    answer_data = {
-                        "type": "answer",
-                        "question_id": question.id,
-                        "question_text": question.text,
-                        "answer_text": answer.answer_text,
-                        "citations": [c.dict() for c in answer.citations],
-                        "confidence_score": answer.confidence_score,
-                        "status": answer.status.value
-                    }
-                    yield f"data: {json.dumps(answer_data)}\n\n"
-                    
-                    # Send progress update
-                    current_count = min(i + len(batch_answers), total_questions)
-                    progress = int((current_count / total_questions) * 100)
-                    yield f"data: {json.dumps({'type': 'progress', 'current': current_count, 'total': total_questions, 'progress': progress})}\n\n"
-                    
-                    # Add delay between requests for Z.AI
-                    import time
-                    time.sleep(2)
-                    
-                except Exception as e:
-                    print(f"Failed to generate answer for question: {question.text[:50]}... Error: {e}")
-                    # Create fallback answer and send it
-                    answer = Answer(
-                        id=str(uuid.uuid4()),
-                        question_id=question.id,
-                        answer_text=f"Unable to generate answer due to API limitations. Question: {question.text}",
-                        citations=[],
-                        confidence_score=0.0,
-                        status=AnswerStatus.MISSING_DATA
-                    )
-                    answer_data = {
-                        "type": "answer",
-                        "question_id": question.id,
-                        "question_text": question.text,
-                        "answer_text": answer.answer_text,
-                        "citations": [],
-                        "confidence_score": 0.0,
-                        "status": "MISSING_DATA"
-                    }
-                    yield f"data: {json.dumps(answer_data)}\n\n"
-        else:
-            # Process batch concurrently for other providers
-            with ThreadPoolExecutor(max_workers=batch_size) as executor:
-                futures = []
-                for question in batch_questions:
-                    future = executor.submit(generate_answer, project_id, question.text)
-                    futures.append((future, question))
-                
-                for future, question in futures:
-                    try:
-                        answer = future.result()
-                        answer.question_id = question.id
-                        batch_answers.append(answer)
-                        
-                        # Send this answer immediately
-                        answer_data = {
-                            "type": "answer",
-                            "question_id": question.id,
-                            "question_text": question.text,
-                            "answer_text": answer.answer_text,
-                            "citations": [c.dict() for c in answer.citations],
-                            "confidence_score": answer.confidence_score,
-                            "status": answer.status.value
-                        }
-                        yield f"data: {json.dumps(answer_data)}\n\n"
-                        
-                    except Exception as e:
-                        print(f"Failed to generate answer for question: {question.text[:50]}... Error: {e}")
-                        answer = Answer(
-                            id=str(uuid.uuid4()),
-                            question_id=question.id,
-                            answer_text=f"Unable to generate answer due to API limitations. Question: {question.text}",
-                            citations=[],
-                            confidence_score=0.0,
-                            status=AnswerStatus.MISSING_DATA
-                        )
-                        answer_data = {
-                            "type": "answer",
-                            "question_id": question.id,
-                            "question_text": question.text,
-                            "answer_text": answer.answer_text,
-                            "citations": [],
-                            "confidence_score": 0.0,
-                            "status": "MISSING_DATA"
-                        }
-                        yield f"data: {json.dumps(answer_data)}\n\n"
-        
-        answers.extend(batch_answers)
+    # Answers are sent in the order they complete
+    async for question, answer in answer_questions(project_id, project.questions, use_cache=use_cache):
+        answers.append(answer)
+        yield answer_event(question, answer)
         
-        # Update progress
-        current_count = min(i + batch_size, total_questions)
+        current_count = len(answers)
         if current_count < total_questions:
             progress = int((current_count / total_questions) * 100)
             yield f"data: {json.dumps({'type': 'progress', 'current': current_count, 'total': total_questions, 'progress': progress, 'message': f'Processed {current_count} of {total_questions} questions...'})}\n\n"
@@ -596,7 +457,10 @@ def stream_answers(project_id: str):
     # Send completion message
     yield f"data: {json.dumps({'type': 'complete', 'total_answers': len(answers), 'message': f'✅ Analysis complete! {len(answers)} AI-powered answers ready.'})}\n\n"
     
-    # Update project with all answers
-    project.answers = answers
-    project.status = ProjectStatus.READY
-    storage.save_project(project)
\ No newline at end of file
+    # Update project with all answers, kept in questionnaire order
+    question_order = {q.id: q.order for q in project.questions}
+    answers.sort(key=lambda a: question_order.get(a.question_id, 0))
+    def finish(project: Project):
+        project.answers = answers
+        project.status = ProjectStatus.READY
+    storage.update_project(project_id, finish)
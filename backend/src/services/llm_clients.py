@@ -0,0 +1,262 @@
+import asyncio
+import httpx
+import os
+import time
+import weakref
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from .rate_limiter import AdaptiveRateLimiter
+
+load_dotenv()
+
+# Connection pool configuration shared by all providers
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "100"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+
+SYSTEM_PROMPT = "You are a helpful assistant that answers questions based on provided documents. Always cite your sources and provide confidence scores."
+
+class ProviderError(Exception):
+    """Raised when a provider returns an error response"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class ProviderClient:
+    """Long-lived, pooled HTTP client for one chat-completions provider.
+
+    A single httpx.Client (for worker threads) and one httpx.AsyncClient per
+    event loop are reused for every question, so connections are kept alive
+    instead of paying TCP/TLS setup per request. An AsyncClient is closed when
+    its loop shuts down (e.g. at the end of asyncio.run).
+    """
+
+    def __init__(self, name: str, label: str, base_url: str, path: str, model: str,
+                 api_key: Optional[str] = None, timeout: float = 30, max_retries: int = 3,
+                 pool_size: int = LLM_POOL_SIZE, concurrency: int = 8, initial_concurrency: Optional[int] = None,
+                 requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.name = name
+        self.label = label
+        self.base_url = base_url.rstrip('/')
+        self.path = path
+        self.model = model
+        self.api_key = api_key
+        self.max_retries = max_retries
+        # Upper bound on in-flight questions; the rate limiter adapts below it
+        self.concurrency = int(os.getenv(f"{name.upper()}_CONCURRENCY", str(concurrency)))
+        self.rate_limiter = AdaptiveRateLimiter(
+            label,
+            requests_per_minute=float(os.getenv(f"{name.upper()}_RPM", str(requests_per_minute))),
+            tokens_per_minute=float(os.getenv(f"{name.upper()}_TPM", str(tokens_per_minute))),
+            max_concurrency=self.concurrency,
+            initial_concurrency=min(initial_concurrency or self.concurrency, self.concurrency)
+        )
+        self.timeout = httpx.Timeout(timeout, connect=min(LLM_CONNECT_TIMEOUT, timeout))
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client: Optional[httpx.Client] = None
+        # event loop -> (AsyncClient, async generator that closes it when the loop shuts down)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def build_payload(self, prompt: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,
+            "max_tokens": 500
+        }
+
+    def parse_response(self, result: dict) -> str:
+        return result["choices"][0]["message"]["content"]
+
+    def cache_params(self) -> dict:
+        """Generation parameters that affect the response, for response cache keys"""
+        payload = self.build_payload("")
+        payload.pop("messages", None)
+        payload["system_prompt"] = SYSTEM_PROMPT
+        return payload
+
+    def _handle_response(self, response: httpx.Response) -> str:
+        if response.status_code == 200:
+            return self.parse_response(response.json()) or ""
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        raise ProviderError(f"{self.label} API error: {response.status_code} - {response.text}", response.status_code, retry_after)
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(base_url=self.base_url, headers=self._headers(), timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # An AsyncClient is bound to the loop it was first used on
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(base_url=self.base_url, headers=self._headers(), timeout=self.timeout, limits=self.limits)
+            closer = self._close_with_loop(loop, client)
+            # Advance the generator to its yield: the loop now tracks it, and its
+            # shutdown_asyncgens() (run by asyncio.run and uvicorn) closes the client
+            try:
+                closer.__anext__().send(None)
+            except StopIteration:
+                pass
+            entry = self._async_clients[loop] = (client, closer)
+        return entry[0]
+
+    async def _close_with_loop(self, loop, client: httpx.AsyncClient):
+        try:
+            yield
+        finally:
+            self._async_clients.pop(loop, None)
+            await client.aclose()
+
+    def _estimate_tokens(self, prompt: str) -> int:
+        # ~4 characters per token, plus the completion budget
+        return len(prompt) // 4 + 500
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is final"""
+        is_rate_limited = isinstance(error, ProviderError) and error.status_code == 429
+        if is_rate_limited:
+            self.rate_limiter.on_rate_limited(error.retry_after)
+        if attempt >= self.max_retries - 1:
+            return None
+        if is_rate_limited:
+            return 0  # The rate limiter pauses until Retry-After has passed
+        if isinstance(error, httpx.TimeoutException):
+            return 2
+        return None
+
+    def chat_sync(self, prompt: str) -> str:
+        """Send one prompt from a worker thread and return the model's text"""
+        tokens = self._estimate_tokens(prompt)
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire_sync(tokens)
+            try:
+                result = self._handle_response(self.client.post(self.path, json=self.build_payload(prompt)))
+                self.rate_limiter.on_success()
+                return result
+            except (ProviderError, httpx.TimeoutException) as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                print(f"{self.label} request failed ({e}), retrying ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+            finally:
+                self.rate_limiter.release()
+
+    async def chat(self, prompt: str) -> str:
+        """Send one prompt without blocking the event loop and return the model's text"""
+        tokens = self._estimate_tokens(prompt)
+        for attempt in range(self.max_retries):
+            await self.rate_limiter.acquire(tokens)
+            try:
+                response = await self.async_client.post(self.path, json=self.build_payload(prompt))
+                result = self._handle_response(response)
+                self.rate_limiter.on_success()
+                return result
+            except (ProviderError, httpx.TimeoutException) as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                print(f"{self.label} request failed ({e}), retrying ({attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+            finally:
+                self.rate_limiter.release()
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        """Close the sync client and the running loop's async client"""
+        self.close()
+        entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            client, closer = entry
+            await closer.aclose()
+
+class OllamaClient(ProviderClient):
+    """Ollama's /api/chat uses its own request and response shape"""
+
+    def build_payload(self, prompt: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "stream": False,
+            "options": {
+                "temperature": 0.1,
+                "num_predict": 500
+            }
+        }
+
+    def parse_response(self, result: dict) -> str:
+        return result["message"]["content"]
+
+def _build_clients() -> Dict[str, ProviderClient]:
+    timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+    return {
+        "ollama": OllamaClient(
+            "ollama", "Ollama", os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"), "/api/chat",
+            os.getenv("OLLAMA_MODEL", "llama3.2:3b"), timeout=timeout
+        ),
+        "openrouter": ProviderClient(
+            "openrouter", "OpenRouter", os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"), "/chat/completions",
+            "stepfun/step-3.5-flash:free", api_key=os.getenv("OPENROUTER_API_KEY"), timeout=timeout
+        ),
+        "grok": ProviderClient(
+            "grok", "Grok", os.getenv("GROK_BASE_URL", "https://api.x.ai/v1"), "/chat/completions",
+            "grok-beta", api_key=os.getenv("GROK_API_KEY"), timeout=timeout
+        ),
+        "together": ProviderClient(
+            "together", "Together AI", os.getenv("TOGETHER_BASE_URL", "https://api.together.xyz/v1"), "/chat/completions",
+            "meta-llama/Llama-2-70b-chat-hf", api_key=os.getenv("TOGETHER_API_KEY"), timeout=timeout
+        ),
+        # Z.AI rate-limits aggressively: start at one request every 2 s and let AIMD probe upwards
+        "zai": ProviderClient(
+            "zai", "Z.AI", os.getenv("ZAI_BASE_URL", "https://open.bigmodel.cn/api/paas/v4"), "/chat/completions",
+            "glm-4.5", api_key=os.getenv("ZAI_API_KEY"), timeout=15,
+            concurrency=4, initial_concurrency=1, requests_per_minute=30
+        ),
+        # OpenAI-compatible local server (e.g. stub_llm_server.py) for offline testing
+        "stub": ProviderClient(
+            "stub", "Stub", os.getenv("STUB_BASE_URL", "http://localhost:8001/v1"), "/chat/completions",
+            "stub", timeout=timeout
+        ),
+    }
+
+_clients: Optional[Dict[str, ProviderClient]] = None
+
+def get_client(provider: str) -> ProviderClient:
+    """Return the shared client for a provider"""
+    global _clients
+    if _clients is None:
+        _clients = _build_clients()
+    if provider not in _clients:
+        raise Exception(f"Unknown AI provider: {provider}")
+    return _clients[provider]
+
+async def close_clients():
+    """Close every pooled connection (called on application shutdown)"""
+    if _clients:
+        for client in _clients.values():
+            await client.aclose()
@@ -1,10 +1,13 @@
-from ..models import Project, ProjectStatus, Question
+from ..models import Document, Project, ProjectStatus, Question
 from ..storage.memory import storage
+import asyncio
 import uuid
-from pypdf import PdfReader
-import fitz  # PyMuPDF
+from ..indexing.extraction import extract_text_from_pdf
+from ..indexing.indexer import indexer
+from ..utils.uploads import get_data_dir
 import re
-from typing import List
+import threading
+from typing import List, Optional
 import os
 
 def parse_questionnaire(file_path: str) -> List[Question]:
@@ -28,21 +31,8 @@ def parse_questionnaire(file_path: str) -> List[Question]:
             with open(file_path, 'r') as f:
                 text = f.read()
         else:
-            # Handle PDF files - try PyMuPDF first, fallback to pypdf
-            try:
-                doc = fitz.open(file_path)
-                text = ""
-                for page in doc:
-                    text += page.get_text() + "\n"
-                doc.close()
-                print("Used PyMuPDF for PDF extraction")
-            except Exception as e:
-                print(f"PyMuPDF failed: {e}, falling back to pypdf")
-                with open(file_path, 'rb') as f:
-                    reader = PdfReader(f)
-                    text = ""
-                    for page in reader.pages:
-                        text += page.extract_text() + "\n"
+            # Handle PDF files - PyMuPDF with pypdf fallback, long files spread across the process pool
+            text = extract_text_from_pdf(file_path)
         
         print(f"Extracted {len(text)} characters from file")
         
@@ -104,12 +94,12 @@ def parse_questionnaire(file_path: str) -> List[Question]:
     
     return questions
 
-def create_project(name: str, questionnaire_file: str, scope: str) -> Project:
+def create_project(name: str, questionnaire_file: str, scope: str, project_id: Optional[str] = None) -> Project:
     print(f"Creating project: {name}, questionnaire: {questionnaire_file}, scope: {scope}")
     questions = parse_questionnaire(questionnaire_file)
     print(f"Parsed {len(questions)} questions")
     project = Project(
-        id=str(uuid.uuid4()),
+        id=project_id or str(uuid.uuid4()),
         name=name,
         status=ProjectStatus.CREATED,
         scope=scope,
@@ -125,7 +115,78 @@ def get_project(project_id: str) -> Optional[Project]:
     return storage.get_project(project_id)
 
 def update_project_status(project_id: str, status: ProjectStatus):
-    project = storage.get_project(project_id)
-    if project:
+    def update(project: Project):
         project.status = status
-        storage.save_project(project)
\ No newline at end of file
+    storage.update_project(project_id, update)
+
+def mark_projects_outdated(doc_id: str, exclude_project_id: Optional[str] = None):
+    """Mark projects already answered from a document OUTDATED after the document was re-indexed"""
+    for project in storage.list_projects_for_document(doc_id):
+        if project.id != exclude_project_id and project.answers:
+            update_project_status(project.id, ProjectStatus.OUTDATED)
+
+def link_documents(project_id: str, doc_ids: List[str], ready: bool = False) -> Optional[Project]:
+    """Add documents to a project and optionally mark it ready, without losing concurrent saves"""
+    def update(project: Project):
+        for doc_id in doc_ids:
+            if doc_id not in project.documents:
+                project.documents.append(doc_id)
+        if ready:
+            # Projects become OUTDATED when new docs are added to projects with ALL_DOCS scope
+            if project.scope == "ALL_DOCS" and len(project.answers) > 0:
+                project.status = ProjectStatus.OUTDATED
+            else:
+                project.status = ProjectStatus.READY
+    return storage.update_project(project_id, update)
+
+def reference_document_paths() -> List[str]:
+    """PDF and TXT files in the data directory, excluding questionnaire files"""
+    data_dir = get_data_dir()
+    return [
+        os.path.join(data_dir, file) for file in sorted(os.listdir(data_dir))
+        if (file.endswith('.pdf') or file.endswith('.txt')) and file != 'ILPA_Due_Diligence_Questionnaire_v1.2.pdf' and file != 'test_questionnaire.txt'
+    ]
+
+async def index_project_documents(project_id: str, on_progress=None) -> List[Document]:
+    """Index every reference document into a project progressively.
+
+    A document joins the project with its first committed batch, and the
+    project is READY once every document is searchable, while long ones are
+    still being indexed. on_progress(doc) is passed through to the indexer
+    (it runs in indexing threads) and is also called once per finished
+    document.
+    """
+    doc_paths = reference_document_paths()
+    update_project_status(project_id, ProjectStatus.INDEXING)
+    started = set()
+    started_lock = threading.Lock()
+    
+    def document_progress(doc):
+        with started_lock:
+            first = doc.id not in started
+            started.add(doc.id)
+            all_started = len(started) >= len(doc_paths)
+        if first:
+            link_documents(project_id, [doc.id], ready=all_started)
+        if on_progress:
+            on_progress(doc)
+    
+    async def ingest(doc_path):
+        indexed = []
+        
+        def batch_progress(doc):
+            indexed.append(doc.id)
+            document_progress(doc)
+        
+        doc = await indexer.aingest_file(doc_path, on_progress=batch_progress)
+        storage.save_document(doc)
+        if indexed:
+            # New or changed file: other projects answered from its old content are stale
+            await asyncio.to_thread(mark_projects_outdated, doc.id, project_id)
+        document_progress(doc)  # Cached documents report no batches
+        return doc
+    
+    # Files are extracted in parallel in the process pool; unchanged files are served from the ingestion cache
+    docs = await asyncio.gather(*(ingest(doc_path) for doc_path in doc_paths))
+    await asyncio.to_thread(indexer.save)
+    return docs
@@ -0,0 +1,148 @@
+import asyncio
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+class TokenBucket:
+    """Refills at rate_per_minute up to capacity; a rate of 0 means unlimited"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be consumed (0 if it can be consumed now)"""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        # Requests larger than the bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+class AdaptiveRateLimiter:
+    """Per-provider limiter: requests/min and tokens/min buckets plus an AIMD concurrency limit.
+
+    Every successful call raises the concurrency limit additively; a 429 halves it
+    and pauses all callers until the provider's Retry-After has passed. Callers
+    waiting for a slot are woken when one is released (threads through a
+    Condition, coroutines through a future on their own loop), and callers
+    waiting for a bucket or a pause sleep exactly until it allows them, so a
+    throttled provider never holds a thread.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 8, initial_concurrency: Optional[int] = None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute, capacity=tokens_per_minute / 6 if tokens_per_minute else None)
+        self.max_concurrency = max_concurrency
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+        # Signalled whenever a slot may have become free
+        self._slot_freed = threading.Condition(self._lock)
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _try_acquire(self, estimated_tokens: int) -> float:
+        """Take a slot and return 0, or return how long to wait before trying again (inf: until a slot is released)"""
+        with self._lock:
+            return self._reserve(estimated_tokens)
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        # Called with the lock held
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.limit):
+            return math.inf
+        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(estimated_tokens, now))
+        if wait > 0:
+            return wait
+        self.requests.consume(1)
+        self.tokens.consume(estimated_tokens)
+        self.in_flight += 1
+        return 0.0
+
+    async def acquire(self, estimated_tokens: int = 0):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._reserve(estimated_tokens)
+                if not wait:
+                    return
+                woken = loop.create_future()
+                self._async_waiters.append((loop, woken))
+            try:
+                await asyncio.wait({woken}, timeout=None if wait == math.inf else wait)
+            finally:
+                with self._lock:
+                    if (loop, woken) in self._async_waiters:
+                        self._async_waiters.remove((loop, woken))
+
+    def acquire_sync(self, estimated_tokens: int = 0):
+        with self._lock:
+            while True:
+                wait = self._reserve(estimated_tokens)
+                if not wait:
+                    return
+                self._slot_freed.wait(None if wait == math.inf else wait)
+
+    def _notify_waiters(self):
+        # Called with the lock held; every waiter re-checks, since they need different amounts of tokens
+        self._slot_freed.notify_all()
+        for loop, woken in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, woken)
+            except RuntimeError:
+                pass  # Its loop has closed
+        self._async_waiters.clear()
+
+    def release(self):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._notify_waiters()
+
+    def on_success(self):
+        # Additive increase: roughly +1 slot per window of successful calls
+        with self._lock:
+            slots = int(self.limit)
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / max(self.limit, 1.0))
+            if int(self.limit) > slots:
+                self._notify_waiters()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        # Multiplicative decrease, and hold everyone back until the provider is ready
+        with self._lock:
+            now = time.monotonic()
+            # 429s from requests already in flight during a pause count as one congestion event
+            if now >= self.paused_until:
+                self.limit = max(1.0, self.limit / 2)
+            pause = retry_after if retry_after else 5.0
+            self.paused_until = max(self.paused_until, now + pause)
+            print(f"{self.name} rate limited: concurrency limit now {int(self.limit)}, pausing {pause}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "paused_for": max(0.0, round(self.paused_until - time.monotonic(), 2))
+            }
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Response cache configuration
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(_backend_dir, "cache", "llm_responses.sqlite"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_TOUCH_INTERVAL = float(os.getenv("LLM_CACHE_TOUCH_INTERVAL", "30"))  # seconds between writes of pending last_used updates
+
+class ResponseCache:
+    """SQLite-backed cache of raw model responses with TTL and size eviction.
+
+    Keys cover the provider, model, generation parameters, the question and
+    the hashes of the retrieved chunks, so an entry is only reused when the
+    model would see exactly the same prompt. A hit is a single read: its
+    last_used time is kept in memory and written in one transaction with the
+    next set, or after LLM_CACHE_TOUCH_INTERVAL seconds, so cached runs do
+    not commit once per question on the event loop.
+    """
+
+    def __init__(self, path: str, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._touched = {}  # key -> last_used not yet written
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT, created REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, params: dict, question: str, chunk_texts) -> str:
+        chunk_hashes = [hashlib.sha1(text.encode()).hexdigest() for text in chunk_texts]
+        payload = json.dumps([provider, model, params, question, chunk_hashes], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._touched[key] = now
+                if now - self._last_flush >= LLM_CACHE_TOUCH_INTERVAL:
+                    self._flush_touched(now)
+                    self._db.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._flush_touched(now)
+            self._writes += 1
+            # Evicting on every write would scan the table; do it periodically
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._db.commit()
+
+    def flush(self):
+        """Write pending last_used updates"""
+        with self._lock:
+            self._flush_touched(time.time())
+            self._db.commit()
+
+    def _flush_touched(self, now: float):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()]
+            )
+            self._touched.clear()
+        self._last_flush = now
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+response_cache = ResponseCache(LLM_CACHE_PATH) if LLM_CACHE_ENABLED else None
@@ -0,0 +1,232 @@
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document as LangchainDocument
+from array import array
+from typing import Dict, List, Optional, Union
+import mmap
+import os
+import pickle
+import threading
+
+# Column name -> array typecode; one entry per chunk, indexed by chunk id
+COLUMNS = {
+    "text_offset": "q",  # byte offset of the text in the blob
+    "text_length": "i",  # byte length of the text
+    "doc": "i",  # row in the document table
+    "chunk_index": "i",
+    "page": "i",  # -1 when the format has no pages
+    "page_end": "i",
+    "start": "q",  # character offsets in the document text
+    "end": "q"
+}
+
+class ChunkStore(Docstore, AddableMixin):
+    """Columnar docstore: chunk texts in one append-only blob, metadata in typed arrays.
+
+    A chunk id is its row number. Texts are stored once, UTF-8 encoded, in the
+    blob file and read back through an mmap (or kept in a bytearray when path
+    is None). Metadata lives in array columns, with each document's id and
+    filename stored once in a document table, and is rebuilt on read, so there
+    is no per-chunk Python object and no second copy of the text. Deleted
+    texts stay in the blob until compact() copies the live ones to a new blob;
+    ids are kept, since citations refer to them.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self.alive = bytearray()
+        self.doc_ids: List[str] = []
+        self.filenames: List[str] = []
+        self._doc_rows: Dict[str, int] = {}
+        self.blob_bytes = 0  # size of the blob
+        self.dead_bytes = 0  # bytes of the blob that belong to deleted chunks
+        self._buffer = bytearray() if path is None else None
+        self._mmap = None
+        self._lock = threading.Lock()
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+
+    def __len__(self) -> int:
+        return len(self.alive)
+
+    @property
+    def next_id(self) -> int:
+        """Id the next added chunk gets; ids are never reused"""
+        return len(self.alive)
+
+    def add(self, texts: Dict[int, LangchainDocument]) -> None:
+        """Append chunks, whose ids must run on from next_id, to the blob and columns"""
+        with self._lock:
+            encoded = []
+            for chunk_id, doc in texts.items():
+                if chunk_id != len(self.alive) + len(encoded):
+                    raise ValueError(f"chunk id {chunk_id} is out of sequence")
+                encoded.append(doc.page_content.encode('utf-8'))
+            if self._buffer is not None:
+                offset = len(self._buffer)
+                self._buffer.extend(b"".join(encoded))
+            else:
+                with open(self.path, 'ab') as f:
+                    # Readers holding the old map keep working; the next read remaps
+                    self._mmap = None
+                    offset = f.tell()
+                    f.write(b"".join(encoded))
+            self.blob_bytes = offset + sum(len(data) for data in encoded)
+            for doc, data in zip(texts.values(), encoded):
+                metadata = doc.metadata
+                self.columns["text_offset"].append(offset)
+                self.columns["text_length"].append(len(data))
+                self.columns["doc"].append(self._doc_row(metadata.get("doc_id", ""), metadata.get("filename", "")))
+                self.columns["chunk_index"].append(metadata.get("chunk_index", 0))
+                self.columns["page"].append(_page(metadata.get("page")))
+                self.columns["page_end"].append(_page(metadata.get("page_end")))
+                self.columns["start"].append(metadata.get("start", 0))
+                self.columns["end"].append(metadata.get("end", 0))
+                self.alive.append(1)
+                offset += len(data)
+
+    def search(self, search: int) -> Union[str, LangchainDocument]:
+        """A chunk's text and metadata, rebuilt from the blob and columns"""
+        if not isinstance(search, int) or not 0 <= search < len(self.alive) or not self.alive[search]:
+            return f"ID {search} not found."
+        return LangchainDocument(page_content=self.text(search), metadata=self.metadata(search))
+
+    def text(self, chunk_id: int) -> str:
+        # Offsets and blob are read together, so a concurrent compact() cannot mix old and new
+        with self._lock:
+            offset, length = self.columns["text_offset"][chunk_id], self.columns["text_length"][chunk_id]
+            blob = self._get_blob()
+        return blob[offset:offset + length].decode('utf-8')
+
+    def metadata(self, chunk_id: int) -> dict:
+        doc = self.columns["doc"][chunk_id]
+        page, page_end = self.columns["page"][chunk_id], self.columns["page_end"][chunk_id]
+        return {
+            "doc_id": self.doc_ids[doc],
+            "chunk_id": chunk_id,
+            "chunk_index": self.columns["chunk_index"][chunk_id],
+            "filename": self.filenames[doc],
+            "page": page if page >= 0 else None,
+            "page_end": page_end if page_end >= 0 else None,
+            "start": self.columns["start"][chunk_id],
+            "end": self.columns["end"][chunk_id]
+        }
+
+    def delete(self, ids: List) -> None:
+        """Mark chunks deleted; their bytes stay in the blob until it is rebuilt"""
+        with self._lock:
+            for chunk_id in ids:
+                if 0 <= chunk_id < len(self.alive) and self.alive[chunk_id]:
+                    self.alive[chunk_id] = 0
+                    self.dead_bytes += self.columns["text_length"][chunk_id]
+
+    @property
+    def dead_ratio(self) -> float:
+        """Share of the blob taken by deleted chunks"""
+        return self.dead_bytes / self.blob_bytes if self.blob_bytes else 0.0
+
+    def compact(self, path: Optional[str] = None):
+        """Copy the live texts to a new blob at path (a new buffer when path is None) and switch to it.
+
+        Ids and metadata are unchanged; deleted rows keep an empty text. The
+        copy runs without the lock, so reads and appends go on meanwhile;
+        chunks appended during it are copied over before switching. The old
+        blob is left for the caller to remove once nothing refers to it.
+        """
+        with self._lock:
+            blob, copied = self._get_blob(), len(self.alive)
+            alive = bytes(self.alive)
+            offsets, lengths = self.columns["text_offset"][:copied], self.columns["text_length"][:copied]
+        new_offsets, new_lengths = array("q"), array("i")
+        out = bytearray() if path is None else open(path, 'wb')
+        try:
+            size = self._copy_texts(blob, range(copied), alive, offsets, lengths, out, 0, new_offsets, new_lengths)
+            with self._lock:
+                # Chunks appended since the first copy; none can be added while the lock is held
+                blob = self._get_blob()
+                rest = range(copied, len(self.alive))
+                self._copy_texts(blob, rest, self.alive, self.columns["text_offset"], self.columns["text_length"], out, size, new_offsets, new_lengths)
+                if path is not None:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    out.close()
+                self.columns["text_offset"], self.columns["text_length"] = new_offsets, new_lengths
+                self.blob_bytes = sum(new_lengths)
+                self.dead_bytes = sum(length for length, live in zip(new_lengths, self.alive) if not live)
+                self.path, self._buffer, self._mmap = path, out if path is None else None, None
+        except BaseException:
+            if path is not None:
+                out.close()
+                os.remove(path)
+            raise
+
+    @staticmethod
+    def _copy_texts(blob, rows, alive, offsets, lengths, out, offset: int, new_offsets: array, new_lengths: array) -> int:
+        """Write the texts of the live rows to out from offset on; returns the offset after them"""
+        for row in rows:
+            length = lengths[row] if alive[row] else 0
+            new_offsets.append(offset if length else 0)
+            new_lengths.append(length)
+            if length:
+                (out.extend if isinstance(out, bytearray) else out.write)(blob[offsets[row]:offsets[row] + length])
+                offset += length
+        return offset
+
+    def dumps(self, generation: int = 0) -> bytes:
+        """The columns and document table pickled (the blob is already on disk), tagged with the index generation"""
+        with self._lock:
+            return pickle.dumps({
+                "generation": generation,
+                "columns": self.columns,
+                "alive": bytes(self.alive),
+                "doc_ids": self.doc_ids,
+                "filenames": self.filenames,
+                "dead_bytes": self.dead_bytes
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def save(self, path: str, generation: int = 0):
+        with open(path, 'wb') as f:
+            f.write(self.dumps(generation))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @classmethod
+    def load(cls, path: str, columns_path: str, generation: Optional[int] = None) -> "ChunkStore":
+        """Reopen a saved store; with a generation, refuse columns written for another one"""
+        with open(columns_path, 'rb') as f:
+            state = pickle.load(f)
+        if generation is not None and state.get("generation") != generation:
+            raise ValueError(f"{columns_path} belongs to index generation {state.get('generation')}, expected {generation}")
+        store = cls(path)
+        store.columns = state["columns"]
+        store.alive = bytearray(state["alive"])
+        store.doc_ids = state["doc_ids"]
+        store.filenames = state["filenames"]
+        store._doc_rows = {doc_id: row for row, doc_id in enumerate(store.doc_ids)}
+        store.blob_bytes = os.path.getsize(path)
+        store.dead_bytes = state.get("dead_bytes", 0)
+        return store
+
+    def _doc_row(self, doc_id: str, filename: str) -> int:
+        row = self._doc_rows.get(doc_id)
+        if row is None or self.filenames[row] != filename:
+            row = self._doc_rows[doc_id] = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.filenames.append(filename)
+        return row
+
+    def _get_blob(self):
+        # Called with the lock held
+        if self._buffer is not None:
+            return self._buffer
+        if self._mmap is None:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+def _page(page: Optional[int]) -> int:
+    return -1 if page is None else page
@@ -1,5 +1,10 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Set
 from ..models import Project, Document, Answer, Request, GroundTruthAnswer, EvaluationResult
+from .sqlite import SQLiteStorage
+import os
+import threading
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")  # "memory", "sqlite"
 
 class InMemoryStorage:
     def __init__(self):
@@ -8,9 +13,32 @@ class InMemoryStorage:
         self.requests: Dict[str, Request] = {}
         self.ground_truth_answers: Dict[str, GroundTruthAnswer] = {}
         self.evaluation_results: Dict[str, EvaluationResult] = {}
+        # Secondary indexes, maintained on save/delete. Dicts with None values act as ordered sets.
+        self._ground_truth_by_question: Dict[str, Dict[str, None]] = {}
+        self._evaluations_by_project: Dict[str, Dict[str, None]] = {}
+        self._projects_by_document: Dict[str, Dict[str, None]] = {}
+        self._project_documents: Dict[str, Set[str]] = {}  # doc ids as of each project's last save
+        self._project_lock = threading.Lock()  # Serializes project writes, see update_project
 
     def save_project(self, project: Project):
+        with self._project_lock:
+            self._save_project(project)
+
+    def _save_project(self, project: Project):
+        self._unlink_project_documents(project.id)
         self.projects[project.id] = project
+        self._project_documents[project.id] = set(project.documents)
+        for doc_id in project.documents:
+            self._projects_by_document.setdefault(doc_id, {})[project.id] = None
+
+    def update_project(self, project_id: str, update: Callable[[Project], None]) -> Optional[Project]:
+        """Apply update to the stored project and save it, atomically with respect to other writers"""
+        with self._project_lock:
+            project = self.projects.get(project_id)
+            if project:
+                update(project)
+                self._save_project(project)
+            return project
 
     def get_project(self, project_id: str) -> Optional[Project]:
         return self.projects.get(project_id)
@@ -18,6 +46,21 @@ class InMemoryStorage:
     def list_projects(self) -> List[Project]:
         return list(self.projects.values())
 
+    def list_projects_for_document(self, doc_id: str) -> List[Project]:
+        return [self.projects[project_id] for project_id in self._projects_by_document.get(doc_id, {})]
+
+    def delete_project(self, project_id: str):
+        with self._project_lock:
+            self._unlink_project_documents(project_id)
+            self.projects.pop(project_id, None)
+
+    def _unlink_project_documents(self, project_id: str):
+        for doc_id in self._project_documents.pop(project_id, ()):
+            ids = self._projects_by_document.get(doc_id, {})
+            ids.pop(project_id, None)
+            if not ids:
+                self._projects_by_document.pop(doc_id, None)
+
     def save_document(self, document: Document):
         self.documents[document.id] = document
 
@@ -27,6 +70,9 @@ class InMemoryStorage:
     def list_documents(self) -> List[Document]:
         return list(self.documents.values())
 
+    def delete_document(self, doc_id: str):
+        self.documents.pop(doc_id, None)
+
     def save_request(self, request: Request):
         self.requests[request.id] = request
 
@@ -37,27 +83,61 @@ class InMemoryStorage:
         return list(self.requests.values())
 
     def save_ground_truth_answer(self, ground_truth: GroundTruthAnswer):
+        self._unlink_ground_truth(ground_truth.id)
         self.ground_truth_answers[ground_truth.id] = ground_truth
+        self._ground_truth_by_question.setdefault(ground_truth.question_id, {})[ground_truth.id] = None
 
     def get_ground_truth_answer(self, question_id: str) -> Optional[GroundTruthAnswer]:
-        for gt in self.ground_truth_answers.values():
-            if gt.question_id == question_id:
-                return gt
-        return None
+        ids = self._ground_truth_by_question.get(question_id)
+        return self.ground_truth_answers[next(iter(ids))] if ids else None
 
     def list_ground_truth_answers(self) -> List[GroundTruthAnswer]:
         return list(self.ground_truth_answers.values())
 
+    def delete_ground_truth_answer(self, ground_truth_id: str):
+        self._unlink_ground_truth(ground_truth_id)
+        self.ground_truth_answers.pop(ground_truth_id, None)
+
+    def _unlink_ground_truth(self, ground_truth_id: str):
+        existing = self.ground_truth_answers.get(ground_truth_id)
+        if existing:
+            ids = self._ground_truth_by_question.get(existing.question_id, {})
+            ids.pop(ground_truth_id, None)
+            if not ids:
+                self._ground_truth_by_question.pop(existing.question_id, None)
+
     def save_evaluation_result(self, evaluation: EvaluationResult):
+        self._unlink_evaluation(evaluation.id)
         self.evaluation_results[evaluation.id] = evaluation
+        self._evaluations_by_project.setdefault(evaluation.project_id, {})[evaluation.id] = None
 
     def get_evaluation_result(self, evaluation_id: str) -> Optional[EvaluationResult]:
         return self.evaluation_results.get(evaluation_id)
 
     def list_evaluation_results(self, project_id: str = None) -> List[EvaluationResult]:
-        results = list(self.evaluation_results.values())
         if project_id:
-            results = [r for r in results if r.project_id == project_id]
-        return results
-
-storage = InMemoryStorage()
\ No newline at end of file
+            return [self.evaluation_results[evaluation_id] for evaluation_id in self._evaluations_by_project.get(project_id, {})]
+        return list(self.evaluation_results.values())
+
+    def delete_evaluation_result(self, evaluation_id: str):
+        self._unlink_evaluation(evaluation_id)
+        self.evaluation_results.pop(evaluation_id, None)
+
+    def _unlink_evaluation(self, evaluation_id: str):
+        existing = self.evaluation_results.get(evaluation_id)
+        if existing:
+            ids = self._evaluations_by_project.get(existing.project_id, {})
+            ids.pop(evaluation_id, None)
+            if not ids:
+                self._evaluations_by_project.pop(existing.project_id, None)
+
+def get_storage():
+    """Create the storage backend selected by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == "sqlite":
+        # Shared by every API and job worker process; see sqlite.py
+        return SQLiteStorage()
+    if STORAGE_BACKEND != "memory":
+        raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return InMemoryStorage()
+
+storage = get_storage()
@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+from ..models import Project, Document, Request, GroundTruthAnswer, EvaluationResult
+
+# SQLite storage configuration
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORAGE_PATH = os.getenv("STORAGE_PATH", os.path.join(_backend_dir, "db", "storage.sqlite"))
+STORAGE_CACHE_MB = int(os.getenv("STORAGE_CACHE_MB", "64"))  # SQLite page cache per process
+
+class SQLiteStorage:
+    """Same interface as InMemoryStorage, persisted in SQLite.
+
+    Records are stored as JSON next to the columns they are looked up by, with
+    secondary indexes on ground truth question_id, evaluation project_id and
+    the project <-> document links. Duplicate files are detected by the
+    indexer (file_cache_key), not here. WAL mode lets API and job worker
+    processes read while one of them writes; update_project serializes
+    read-modify-writes of a project across those processes. Memory is bounded by the page
+    cache, not by the amount of stored data. Objects returned are copies:
+    save them to persist changes.
+    """
+
+    def __init__(self, path: str = STORAGE_PATH, cache_mb: int = STORAGE_CACHE_MB):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS projects (id TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS project_documents (project_id TEXT, doc_id TEXT, PRIMARY KEY (project_id, doc_id));
+            CREATE INDEX IF NOT EXISTS project_documents_doc_id ON project_documents (doc_id);
+            CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS requests (id TEXT PRIMARY KEY, data TEXT);
+            CREATE TABLE IF NOT EXISTS ground_truth_answers (id TEXT PRIMARY KEY, question_id TEXT, data TEXT);
+            CREATE INDEX IF NOT EXISTS ground_truth_question_id ON ground_truth_answers (question_id);
+            CREATE TABLE IF NOT EXISTS evaluation_results (id TEXT PRIMARY KEY, project_id TEXT, data TEXT);
+            CREATE INDEX IF NOT EXISTS evaluation_results_project_id ON evaluation_results (project_id);
+            -- Unused lookup from an earlier schema version
+            DROP INDEX IF EXISTS documents_content_hash;
+        """)
+        if self._db.execute("SELECT NOT EXISTS (SELECT 1 FROM project_documents)").fetchone()[0]:
+            # Links of projects saved while the table did not exist
+            self._db.execute(
+                "INSERT OR IGNORE INTO project_documents (project_id, doc_id) "
+                "SELECT projects.id, documents.value FROM projects, json_each(projects.data, '$.documents') AS documents"
+            )
+        self._db.commit()
+
+    def _put(self, table: str, record, **columns):
+        with self._lock:
+            self._write(table, record, **columns)
+            self._db.commit()
+
+    def _write(self, table: str, record, **columns):
+        names = ["id", *columns, "data"]
+        values = [record.id, *columns.values(), record.model_dump_json()]
+        # Upsert rather than REPLACE so a record keeps its rowid (and list order) when updated
+        self._db.execute(
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {', '.join(f'{name} = excluded.{name}' for name in names[1:])}",
+            values
+        )
+        if table == "projects":
+            self._db.execute("DELETE FROM project_documents WHERE project_id = ?", (record.id,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO project_documents (project_id, doc_id) VALUES (?, ?)",
+                [(record.id, doc_id) for doc_id in record.documents]
+            )
+
+    def _delete(self, table: str, record_id: str):
+        with self._lock:
+            self._db.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+            if table == "projects":
+                self._db.execute("DELETE FROM project_documents WHERE project_id = ?", (record_id,))
+            self._db.commit()
+
+    def _query(self, model, sql: str, params=()) -> list:
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [model.model_validate_json(row[0]) for row in rows]
+
+    def _get(self, model, table: str, record_id: str):
+        records = self._query(model, f"SELECT data FROM {table} WHERE id = ?", (record_id,))
+        return records[0] if records else None
+
+    def save_project(self, project: Project):
+        self._put("projects", project)
+
+    def get_project(self, project_id: str) -> Optional[Project]:
+        return self._get(Project, "projects", project_id)
+
+    def update_project(self, project_id: str, update: Callable[[Project], None]) -> Optional[Project]:
+        """Apply update to the stored project and save it, atomically across processes"""
+        with self._lock:
+            # The write lock is taken before the read, so no other process can save in between
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT data FROM projects WHERE id = ?", (project_id,)).fetchone()
+                project = Project.model_validate_json(row[0]) if row else None
+                if project:
+                    update(project)
+                    self._write("projects", project)
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return project
+
+    def list_projects(self) -> List[Project]:
+        return self._query(Project, "SELECT data FROM projects ORDER BY rowid")
+
+    def list_projects_for_document(self, doc_id: str) -> List[Project]:
+        return self._query(
+            Project,
+            "SELECT data FROM projects WHERE id IN (SELECT project_id FROM project_documents WHERE doc_id = ?) ORDER BY rowid",
+            (doc_id,)
+        )
+
+    def delete_project(self, project_id: str):
+        self._delete("projects", project_id)
+
+    def save_document(self, document: Document):
+        self._put("documents", document)
+
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        return self._get(Document, "documents", doc_id)
+
+    def list_documents(self) -> List[Document]:
+        return self._query(Document, "SELECT data FROM documents ORDER BY rowid")
+
+    def delete_document(self, doc_id: str):
+        self._delete("documents", doc_id)
+
+    def save_request(self, request: Request):
+        self._put("requests", request)
+
+    def get_request(self, request_id: str) -> Optional[Request]:
+        return self._get(Request, "requests", request_id)
+
+    def list_requests(self) -> List[Request]:
+        return self._query(Request, "SELECT data FROM requests ORDER BY rowid")
+
+    def save_ground_truth_answer(self, ground_truth: GroundTruthAnswer):
+        self._put("ground_truth_answers", ground_truth, question_id=ground_truth.question_id)
+
+    def get_ground_truth_answer(self, question_id: str) -> Optional[GroundTruthAnswer]:
+        answers = self._query(
+            GroundTruthAnswer, "SELECT data FROM ground_truth_answers WHERE question_id = ? ORDER BY rowid LIMIT 1", (question_id,)
+        )
+        return answers[0] if answers else None
+
+    def list_ground_truth_answers(self) -> List[GroundTruthAnswer]:
+        return self._query(GroundTruthAnswer, "SELECT data FROM ground_truth_answers ORDER BY rowid")
+
+    def delete_ground_truth_answer(self, ground_truth_id: str):
+        self._delete("ground_truth_answers", ground_truth_id)
+
+    def save_evaluation_result(self, evaluation: EvaluationResult):
+        self._put("evaluation_results", evaluation, project_id=evaluation.project_id)
+
+    def get_evaluation_result(self, evaluation_id: str) -> Optional[EvaluationResult]:
+        return self._get(EvaluationResult, "evaluation_results", evaluation_id)
+
+    def list_evaluation_results(self, project_id: str = None) -> List[EvaluationResult]:
+        if project_id:
+            return self._query(
+                EvaluationResult, "SELECT data FROM evaluation_results WHERE project_id = ? ORDER BY rowid", (project_id,)
+            )
+        return self._query(EvaluationResult, "SELECT data FROM evaluation_results ORDER BY rowid")
+
+    def delete_evaluation_result(self, evaluation_id: str):
+        self._delete("evaluation_results", evaluation_id)
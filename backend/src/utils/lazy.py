@@ -0,0 +1,38 @@
+import importlib
+import importlib.util
+import sys
+import threading
+
+_lock = threading.Lock()
+
+class _LazyModule:
+    """Stands in for a module until one of its attributes is first used"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            # importlib.util.LazyLoader lets a second thread see the module half-executed (before 3.12)
+            with _lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self._name}'>"
+
+def lazy_import(name: str):
+    """A module that is only executed when one of its attributes is first used.
+
+    Lets a module name a heavy dependency (faiss, numpy) at the top without
+    making everyone who imports it pay for loading it.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return _LazyModule(name)
@@ -0,0 +1,86 @@
+"""The shared process pool for CPU-bound extraction and chunking.
+
+The pool is opt-in: the API and job_worker.py call enable_process_pool()
+at startup. Pool workers are started with spawn, which re-imports the
+parent's __main__ module, so a script that imports the indexer without an
+`if __name__ == "__main__":` guard would break the pool; such scripts just
+run everything in-process. If the pool breaks anyway, the work is finished
+in-process and the pool stays off.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional
+
+# Worker processes for CPU-bound extraction and chunking (0 = run in a thread instead)
+INDEXING_PROCESSES = int(os.getenv("INDEXING_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_enabled = False
+_in_pool_worker = False
+
+def _mark_pool_worker():
+    global _in_pool_worker
+    _in_pool_worker = True
+
+def enable_process_pool():
+    """Let this process fan work out to the pool; call it from a __main__-guarded entry point"""
+    global _pool_enabled
+    _pool_enabled = True
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared indexing process pool, created on first use (None unless enabled)"""
+    global _process_pool
+    if _process_pool is None and _pool_enabled and INDEXING_PROCESSES > 0:
+        # spawn, not fork: forking a process that already runs threads (uvicorn, FAISS) can deadlock
+        _process_pool = ProcessPoolExecutor(
+            INDEXING_PROCESSES, mp_context=multiprocessing.get_context("spawn"), initializer=_mark_pool_worker
+        )
+    return _process_pool
+
+async def run_in_process(func, *args):
+    """Run a picklable CPU-bound function without blocking the event loop"""
+    pool = get_process_pool()
+    if pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        except BrokenProcessPool as e:
+            _discard_pool(pool, e)
+    return await asyncio.to_thread(func, *args)
+
+def pool_parallelism() -> int:
+    """Processes this process can fan work out to; 0 inside a pool worker, which must not start its own pool"""
+    return INDEXING_PROCESSES if _pool_enabled and not _in_pool_worker else 0
+
+def map_in_process(func, *iterables) -> Iterator:
+    """Blocking, order-preserving map over the shared process pool (inline inside a pool worker or without a pool)"""
+    pool = get_process_pool() if pool_parallelism() > 0 else None
+    if pool is None:
+        yield from map(func, *iterables)
+        return
+    iterables = [list(iterable) for iterable in iterables]
+    done = 0
+    try:
+        for result in pool.map(func, *iterables):
+            yield result
+            done += 1
+    except BrokenProcessPool as e:
+        _discard_pool(pool, e)
+        yield from map(func, *(iterable[done:] for iterable in iterables))
+
+def _discard_pool(pool: ProcessPoolExecutor, error: Exception):
+    global _process_pool, _pool_enabled
+    print(f"Indexing process pool failed, continuing in-process: {error}")
+    _pool_enabled = False
+    if _process_pool is pool:
+        _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_pools():
+    """Stop the worker processes (called on application shutdown)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
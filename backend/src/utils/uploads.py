@@ -0,0 +1,41 @@
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Tuple
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes read per iteration
+
+def get_data_dir() -> str:
+    """The project's data directory (created if missing)"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    backend_dir = os.path.dirname(os.path.dirname(current_dir))
+    project_root = os.path.dirname(backend_dir)
+    data_dir = os.path.join(project_root, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+def save_upload(source: BinaryIO, filename: str) -> Tuple[str, str, int]:
+    """Stream an upload into the data directory; returns (file_path, sha256, size).
+
+    The file is copied in fixed-size chunks and hashed on the way, so memory
+    use does not depend on the upload size. It is written to a temporary name
+    and renamed, so readers never see a partial file.
+    """
+    data_dir = get_data_dir()
+    # Never let a client-supplied name escape the data directory
+    file_path = os.path.join(data_dir, os.path.basename(filename))
+    tmp_path = os.path.join(data_dir, f".upload-{uuid.uuid4().hex}.tmp")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for block in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+                hasher.update(block)
+                f.write(block)
+                size += len(block)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return file_path, hasher.hexdigest(), size
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Iterable, List, Optional
+from ..models import Request, RequestStatus
+
+# Job queue configuration
+_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(_backend_dir, "db", "jobs.sqlite"))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "60"))  # seconds a lease lasts without a heartbeat
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+class JobQueue:
+    """Durable job queue in SQLite, shared by the API and any number of worker processes.
+
+    A worker leases a job for JOB_VISIBILITY_TIMEOUT seconds and keeps the lease
+    alive with heartbeats. If the worker dies, the lease expires and the job becomes
+    visible to other workers again. Failed jobs are retried with exponential
+    backoff up to max_attempts. The job's input payload is kept apart from its
+    result, so a retry always starts from the original request.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode so leasing can take an explicit write lock with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, type TEXT, status TEXT, payload TEXT, result TEXT, error TEXT, "
+            "attempts INTEGER DEFAULT 0, lease_owner TEXT, lease_expires REAL, available_at REAL, "
+            "created REAL, updated REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status_available ON jobs (status, available_at)")
+
+    def _to_request(self, row) -> Request:
+        id, type, status, payload, result, error = row
+        return Request(
+            id=id,
+            type=type,
+            status=RequestStatus(status),
+            result=json.loads(result) if result is not None else json.loads(payload),
+            error=error
+        )
+
+    def enqueue(self, type: str, data: dict) -> str:
+        request_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, type, status, payload, available_at, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_id, type, RequestStatus.PENDING.value, json.dumps(data), now, now, now)
+            )
+        return request_id
+
+    def lease(self, worker_id: str, exclude_types: Iterable[str] = ()) -> Optional[Request]:
+        """Claim the oldest runnable job (pending, or in progress with an expired lease) not of an excluded type"""
+        now = time.time()
+        exclude_types = list(exclude_types)
+        type_filter = f" AND type NOT IN ({', '.join('?' * len(exclude_types))})" if exclude_types else ""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose worker died too many times are given up on
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = 'Worker lease expired too many times', lease_owner = NULL, updated = ? "
+                    "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (RequestStatus.FAILED.value, now, RequestStatus.IN_PROGRESS.value, now, self.max_attempts)
+                )
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?))"
+                    + type_filter + " ORDER BY created LIMIT 1",
+                    (RequestStatus.PENDING.value, now, RequestStatus.IN_PROGRESS.value, now, *exclude_types)
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, result = NULL, updated = ? "
+                    "WHERE id = ?",
+                    (RequestStatus.IN_PROGRESS.value, worker_id, now + self.visibility_timeout, now, row[0])
+                )
+                job = self._db.execute(
+                    "SELECT id, type, status, payload, result, error FROM jobs WHERE id = ?", (row[0],)
+                ).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self._to_request(job)
+
+    def heartbeat(self, request_id: str, worker_id: str) -> bool:
+        """Extend a lease; False if the worker no longer owns the job"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+                (time.time() + self.visibility_timeout, request_id, worker_id, RequestStatus.IN_PROGRESS.value)
+            )
+            return cursor.rowcount == 1
+
+    def save_request(self, request: Request):
+        """Record intermediate results (e.g. progress) of a running job"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET result = ?, updated = ? WHERE id = ?",
+                (json.dumps(request.result), time.time(), request.id)
+            )
+
+    def complete(self, request: Request, worker_id: str):
+        """Mark a job done; ignored if the worker's lease was lost to another worker"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+                (RequestStatus.COMPLETED.value, json.dumps(request.result), time.time(), request.id, worker_id)
+            )
+
+    def fail(self, request: Request, worker_id: str, error: str):
+        """Schedule a retry with exponential backoff, or mark the job failed after max_attempts"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT attempts FROM jobs WHERE id = ? AND lease_owner = ?", (request.id, worker_id)).fetchone()
+            if row is None:
+                return  # Lease lost; the job belongs to another worker now
+            if row[0] < self.max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, result = NULL, lease_owner = NULL, available_at = ?, updated = ? WHERE id = ?",
+                    (RequestStatus.PENDING.value, error, now + min(60, 2 ** row[0]), now, request.id)
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, updated = ? WHERE id = ?",
+                    (RequestStatus.FAILED.value, error, now, request.id)
+                )
+
+    def get_request(self, request_id: str) -> Optional[Request]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, type, status, payload, result, error FROM jobs WHERE id = ?", (request_id,)
+            ).fetchone()
+        return self._to_request(row) if row else None
+
+    def list_requests(self) -> List[Request]:
+        with self._lock:
+            rows = self._db.execute("SELECT id, type, status, payload, result, error FROM jobs ORDER BY created").fetchall()
+        return [self._to_request(row) for row in rows]
+
+job_queue = JobQueue()
@@ -0,0 +1,149 @@
+"""One job that takes a new project from questionnaire to answers.
+
+The questionnaire is parsed, documents are indexed progressively, and each
+question is answered as soon as the indexed context covers enough of its
+terms instead of after the whole data room is indexed. Questions that never
+reach that coverage are answered once indexing finishes. Answers are saved
+to the project as they complete, so stream_pipeline can relay them from any
+process.
+"""
+import asyncio
+import json
+import os
+import time
+from ..models import Project, ProjectStatus, Question, Request, RequestStatus
+from ..storage.memory import storage
+from ..indexing.inverted_index import tokenize
+from ..services.project_service import create_project, index_project_documents
+from ..services.answer_service import answer_event, answer_queued_questions, retrieve_contexts
+from .job_queue import job_queue
+
+PIPELINE_MIN_COVERAGE = float(os.getenv("PIPELINE_MIN_COVERAGE", "0.6"))  # share of a question's terms the context must contain to answer early
+PIPELINE_POLL_INTERVAL = float(os.getenv("PIPELINE_POLL_INTERVAL", "0.5"))  # seconds between checks for new answers while streaming
+
+_STOPWORDS = frozenset(
+    "a an and any are as at be by do does for from has have how in is it its of on or "
+    "the their there this to was were what when where which who why with you your".split()
+)
+
+def context_coverage(question_text: str, chunks) -> float:
+    """Share of a question's content terms found in the retrieved chunks"""
+    terms = {term for term in tokenize(question_text) if term not in _STOPWORDS}
+    if not terms:
+        return 1.0
+    found = set()
+    for chunk in chunks:
+        found.update(tokenize(chunk.page_content))
+    return len(terms & found) / len(terms)
+
+async def run_pipeline(request: Request):
+    """Create a project, index its documents and answer its questions, overlapping the last two"""
+    data = request.result or {}
+    use_cache = data.get("use_cache", True)
+    project = await asyncio.to_thread(
+        create_project, data["name"], data["questionnaire_file"], data["scope"], data.get("project_id")
+    )
+    pending = {question.id: question for question in project.questions}
+    total_questions = len(pending)
+    answers = []
+    start_time = time.time()
+    # Questions whose context is ready; answered by the same workers as answer_questions
+    ready = asyncio.Queue()
+
+    def report_progress(question: Question):
+        current_count = len(answers)
+        elapsed = time.time() - start_time
+        current_question_text = question.text[:50] + "..." if len(question.text) > 50 else question.text
+        request.result = {
+            "project_id": project.id,
+            "status": "processing",
+            "progress": {
+                "current": current_count,
+                "total": total_questions,
+                "progress": int((current_count / total_questions) * 100),
+                "estimated_seconds_remaining": int(elapsed / current_count * (total_questions - current_count)),
+                "current_question": f"Processing: {current_question_text}"
+            }
+        }
+        job_queue.save_request(request)
+
+    async def collect_answers():
+        async for question, result in answer_queued_questions(project.id, ready, total_questions, use_cache=use_cache):
+            answers.append(result)
+            # Saved one by one so stream_pipeline can relay answers while the job runs
+            def add_answer(saved: Project):
+                saved.answers = [a for a in saved.answers if a.question_id != question.id] + [result]
+            storage.update_project(project.id, add_answer)
+            report_progress(question)
+
+    def dispatch(question: Question, chunks):
+        del pending[question.id]
+        ready.put_nowait((question, chunks))
+
+    collecting = asyncio.create_task(collect_answers())
+    try:
+        if project.scope == "ALL_DOCS":
+            loop = asyncio.get_running_loop()
+            indexed_more = asyncio.Event()
+
+            def on_progress(doc):
+                # Called from indexing threads after every committed batch
+                loop.call_soon_threadsafe(indexed_more.set)
+
+            indexing = asyncio.create_task(index_project_documents(project.id, on_progress))
+            while pending and not indexing.done():
+                waiter = asyncio.create_task(indexed_more.wait())
+                await asyncio.wait({indexing, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                indexed_more.clear()
+                # Bursts of batches are coalesced into one batched retrieval over the waiting questions
+                contexts = await asyncio.to_thread(retrieve_contexts, project.id, list(pending.values())) or {}
+                for question in list(pending.values()):
+                    chunks = contexts.get(question.id)
+                    if chunks and context_coverage(question.text, chunks) >= PIPELINE_MIN_COVERAGE:
+                        dispatch(question, chunks)
+            await indexing
+
+        contexts = await asyncio.to_thread(retrieve_contexts, project.id, list(pending.values())) or {}
+        for question in list(pending.values()):
+            dispatch(question, contexts.get(question.id))
+        await collecting
+    finally:
+        collecting.cancel()
+
+    # Final answers in questionnaire order
+    question_order = {q.id: q.order for q in project.questions}
+    answers.sort(key=lambda a: question_order.get(a.question_id, 0))
+    def finish(saved: Project):
+        saved.answers = answers
+        saved.status = ProjectStatus.READY
+    storage.update_project(project.id, finish)
+    request.result = {"project_id": project.id, "answers": [a.dict() for a in answers]}
+
+async def stream_pipeline(project_id: str, request_id: str):
+    """Relay a pipeline job's answers as Server-Sent Events, in the format of stream_answers"""
+    sent = set()
+    yield f"data: {json.dumps({'type': 'progress', 'current': 0, 'total': 0, 'message': 'Indexing documents and starting AI analysis...'})}\n\n"
+    while True:
+        # Read the job before the project: once it is complete, every answer is already saved
+        request = await asyncio.to_thread(job_queue.get_request, request_id)
+        project = await asyncio.to_thread(storage.get_project, project_id)
+        if project:
+            questions = {q.id: q for q in project.questions}
+            total_questions = len(questions)
+            for answer in project.answers:
+                if answer.question_id in sent or answer.question_id not in questions:
+                    continue
+                sent.add(answer.question_id)
+                yield answer_event(questions[answer.question_id], answer)
+                if len(sent) < total_questions:
+                    progress = int((len(sent) / total_questions) * 100)
+                    yield f"data: {json.dumps({'type': 'progress', 'current': len(sent), 'total': total_questions, 'progress': progress, 'message': f'Processed {len(sent)} of {total_questions} questions...'})}\n\n"
+        if request is None or request.status == RequestStatus.FAILED:
+            yield f"data: {json.dumps({'error': request.error if request else 'Request not found'})}\n\n"
+            return
+        if request.status == RequestStatus.COMPLETED:
+            break
+        await asyncio.sleep(PIPELINE_POLL_INTERVAL)
+
+    yield f"data: {json.dumps({'type': 'complete', 'total_answers': len(sent), 'message': f'✅ Analysis complete! {len(sent)} AI-powered answers ready.'})}\n\n"
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Local stub LLM server for offline testing (AI_PROVIDER=stub or ollama)
+
+Run: python stub_llm_server.py  (listens on STUB_PORT, default 8001)
+Serves OpenAI-style /v1/chat/completions and Ollama-style /api/chat with a
+fixed ANSWER/CITATIONS/CONFIDENCE reply after STUB_LATENCY seconds.
+Set STUB_MAX_CONCURRENCY to answer 429 (Retry-After: 1) above that many
+in-flight requests, to exercise the rate limiter.
+"""
+
+import asyncio
+import os
+import re
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+STUB_PORT = int(os.getenv("STUB_PORT", "8001"))
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0.5"))
+STUB_MAX_CONCURRENCY = int(os.getenv("STUB_MAX_CONCURRENCY", "0"))  # 0 = unlimited
+
+in_flight = 0
+
+app = FastAPI(title="Stub LLM")
+
+async def stub_reply(payload: dict) -> str:
+    await asyncio.sleep(STUB_LATENCY)
+    prompt = payload["messages"][-1]["content"]
+    match = re.search(r'answer the question: "(.*?)"', prompt)
+    question = match.group(1) if match else prompt[:60]
+    return f"ANSWER: Stub answer for: {question}\nCITATIONS: Stub document, Page 1\nCONFIDENCE: 0.8"
+
+async def limited_reply(request: Request):
+    global in_flight
+    if STUB_MAX_CONCURRENCY and in_flight >= STUB_MAX_CONCURRENCY:
+        return None
+    in_flight += 1
+    try:
+        return await stub_reply(await request.json())
+    finally:
+        in_flight -= 1
+
+def rate_limited_response():
+    return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    content = await limited_reply(request)
+    if content is None:
+        return rate_limited_response()
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+@app.post("/api/chat")
+async def ollama_chat(request: Request):
+    content = await limited_reply(request)
+    if content is None:
+        return rate_limited_response()
+    return {"message": {"role": "assistant", "content": content}}
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=STUB_PORT)
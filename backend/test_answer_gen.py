@@ -25,7 +25,7 @@ for file in os.listdir(data_dir):
         indexer.index_document(doc)
         storage.save_document(doc)
         project.documents.append(doc.id)
-        print(f'Indexed document: {file}, ID: {doc.id}, Chunks: {len(doc.chunks)}')
+        print(f'Indexed document: {file}, ID: {doc.id}, Chunks: {doc.chunks_indexed}')
 
 storage.save_project(project)
 print(f'Project now has {len(project.documents)} documents')
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+# Modules such as job_queue open their database on import; keep that out of backend/db
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(prefix="backend-tests-"), "jobs.sqlite"))
+
+import pytest
+
+class FakeClock:
+    """Stands in for a module's time: time() and monotonic() only move when advance() is called"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """fake_clock(module, start) replaces module.time with a FakeClock for the test and returns it"""
+    def install(module, start: float = 0.0) -> FakeClock:
+        clock = FakeClock(start)
+        monkeypatch.setattr(module, "time", clock)
+        return clock
+    return install
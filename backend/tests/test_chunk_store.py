@@ -0,0 +1,94 @@
+import pytest
+from langchain_core.documents import Document as LangchainDocument
+
+from src.storage.chunk_store import ChunkStore
+
+def chunk(text, doc_id="doc", filename="report.pdf", chunk_index=0, page=None, page_end=None, start=0, end=0):
+    return LangchainDocument(page_content=text, metadata={
+        "doc_id": doc_id, "filename": filename, "chunk_index": chunk_index,
+        "page": page, "page_end": page_end, "start": start, "end": end
+    })
+
+@pytest.fixture(params=["file", "memory"])
+def store(request, tmp_path):
+    return ChunkStore(str(tmp_path / "chunks.bin") if request.param == "file" else None)
+
+def test_add_and_search_rebuild_text_and_metadata(store):
+    store.add({0: chunk("First chunk", page=1, page_end=2, start=0, end=11), 1: chunk("Zweiter Abschnitt – ü", chunk_index=1, start=11, end=32)})
+    assert len(store) == 2 and store.next_id == 2
+    first, second = store.search(0), store.search(1)
+    assert first.page_content == "First chunk"
+    assert first.metadata == {
+        "doc_id": "doc", "chunk_id": 0, "chunk_index": 0, "filename": "report.pdf",
+        "page": 1, "page_end": 2, "start": 0, "end": 11
+    }
+    assert second.page_content == "Zweiter Abschnitt – ü"
+    assert second.metadata["page"] is None and second.metadata["chunk_index"] == 1
+
+def test_ids_must_run_on_from_next_id(store):
+    store.add({0: chunk("a")})
+    with pytest.raises(ValueError):
+        store.add({2: chunk("b")})
+
+def test_documents_are_stored_once(store):
+    store.add({0: chunk("a"), 1: chunk("b"), 2: chunk("c", doc_id="other", filename="other.txt")})
+    assert store.doc_ids == ["doc", "other"]
+    assert store.search(2).metadata["filename"] == "other.txt"
+
+def test_delete_hides_chunks_and_ids_are_not_reused(store):
+    store.add({0: chunk("a"), 1: chunk("b")})
+    store.delete([0, 5])
+    assert store.search(0) == "ID 0 not found."
+    assert store.search(1).page_content == "b"
+    assert store.next_id == 2
+
+def test_reads_see_chunks_appended_after_the_blob_was_mapped(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.bin"))
+    store.add({0: chunk("before")})
+    assert store.text(0) == "before"
+    store.add({1: chunk("after")})
+    assert store.text(1) == "after"
+
+def test_save_and_load_read_texts_through_mmap(tmp_path):
+    path, columns_path = str(tmp_path / "chunks.bin"), str(tmp_path / "chunks.1.cols")
+    store = ChunkStore(path)
+    store.add({0: chunk("kept", page=3, page_end=3), 1: chunk("deleted", chunk_index=1)})
+    store.delete([1])
+    store.save(columns_path, generation=1)
+
+    loaded = ChunkStore.load(path, columns_path, generation=1)
+    assert loaded.search(0).page_content == "kept"
+    assert loaded.search(0).metadata["page"] == 3
+    assert loaded.search(1) == "ID 1 not found."
+    assert loaded._mmap is not None
+    loaded.add({2: chunk("appended after load", chunk_index=2)})
+    assert loaded.search(2).page_content == "appended after load"
+
+def test_load_refuses_columns_from_another_generation(tmp_path):
+    path, columns_path = str(tmp_path / "chunks.bin"), str(tmp_path / "chunks.1.cols")
+    store = ChunkStore(path)
+    store.add({0: chunk("a")})
+    store.save(columns_path, generation=1)
+    with pytest.raises(ValueError):
+        ChunkStore.load(path, columns_path, generation=2)
+
+def test_compact_drops_deleted_texts_and_keeps_ids(store, tmp_path):
+    store.add({0: chunk("deleted " * 10), 1: chunk("kept", page=2), 2: chunk("also deleted")})
+    store.delete([0, 2])
+    assert store.dead_bytes == len("deleted " * 10) + len("also deleted")
+    store.compact(str(tmp_path / "chunks.2.bin") if store.path else None)
+    assert store.blob_bytes == len("kept") and store.dead_bytes == 0
+    assert store.search(1).page_content == "kept" and store.search(1).metadata["page"] == 2
+    assert store.search(0) == "ID 0 not found."
+    store.add({3: chunk("after compaction")})
+    assert store.text(3) == "after compaction"
+
+def test_compacted_store_reloads_from_its_new_blob(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.bin"))
+    store.add({0: chunk("old"), 1: chunk("new")})
+    store.delete([0])
+    store.compact(str(tmp_path / "chunks.1.bin"))
+    store.save(str(tmp_path / "chunks.1.cols"), generation=1)
+    loaded = ChunkStore.load(str(tmp_path / "chunks.1.bin"), str(tmp_path / "chunks.1.cols"), generation=1)
+    assert loaded.search(1).page_content == "new"
+    assert loaded.dead_ratio == 0.0
@@ -0,0 +1,42 @@
+import sqlite3
+
+import numpy as np
+
+from src.indexing.embeddings import CachedEmbeddings, MockEmbeddings
+
+def cached(tmp_path, **kwargs):
+    return CachedEmbeddings(MockEmbeddings(), str(tmp_path / "embedding_cache.sqlite"), **kwargs)
+
+def stored_texts(embeddings, texts):
+    keys = {embeddings._key(text): text for text in texts}
+    return sorted(keys[row[0]] for row in embeddings._db.execute("SELECT key FROM embeddings") if row[0] in keys)
+
+def test_sqlite_cache_is_shared_in_wal_mode(tmp_path):
+    first, second = cached(tmp_path), cached(tmp_path)
+    assert first._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    vectors = first.embed_matrix(["a", "b"])
+    assert np.array_equal(second.embed_matrix(["a", "b"]), vectors)
+    assert second.misses == 0 and second.hits == 2
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    embeddings = cached(tmp_path, max_entries=1, max_db_entries=10)
+    texts = [f"text {n}" for n in range(10)]
+    for text in texts:
+        embeddings.embed_matrix([text])
+    # Read back from SQLite (the in-memory LRU holds one entry), so "text 0" becomes the most recently used
+    embeddings.embed_matrix(["text 0"])
+    embeddings.embed_matrix(["text 10"])
+    remaining = stored_texts(embeddings, texts + ["text 10"])
+    assert len(remaining) == 9
+    assert "text 0" in remaining and "text 10" in remaining
+    assert "text 1" not in remaining and "text 2" not in remaining
+
+def test_cache_without_last_use_column_is_upgraded(tmp_path):
+    path = tmp_path / "embedding_cache.sqlite"
+    db = sqlite3.connect(str(path))
+    db.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+    db.commit()
+    db.close()
+    embeddings = cached(tmp_path)
+    embeddings.embed_matrix(["a"])
+    assert embeddings._db.execute("SELECT used FROM embeddings").fetchone()[0] > 0
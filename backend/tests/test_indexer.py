@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from src.indexing.embeddings import MockEmbeddings
+from src.indexing.indexer import DocumentIndexer
+
+@pytest.fixture
+def indexer():
+    return DocumentIndexer(index_dir=None)
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / "report.txt"
+    path.write_text("\n\n".join(f"Section {n}: revenue, litigation and headcount figures for year {n}. " * 8 for n in range(40)))
+    return str(path)
+
+def assert_indexed_once(indexer, doc_ids):
+    assert len(set(doc_ids)) == 1
+    assert list(indexer.documents) == [doc_ids[0]]
+    chunk_ids = indexer.documents[doc_ids[0]]["chunk_ids"]
+    assert len(chunk_ids) > 1
+    assert indexer.vectorstore.index.ntotal == len(chunk_ids)
+    assert set(indexer.inverted_index.chunk_lengths) == set(chunk_ids)
+
+def test_concurrent_async_ingests_of_one_file_index_it_once(indexer, report):
+    async def ingest_twice():
+        return await asyncio.gather(indexer.aingest_file(report), indexer.aingest_file(report))
+
+    docs = asyncio.run(ingest_twice())
+    assert_indexed_once(indexer, [doc.id for doc in docs])
+
+def test_concurrent_threaded_ingests_of_one_file_index_it_once(indexer, report):
+    doc_ids = []
+    threads = [threading.Thread(target=lambda: doc_ids.append(indexer.ingest_file(report).id)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert_indexed_once(indexer, doc_ids)
+
+def test_changed_file_is_reindexed_under_the_same_id(indexer, report, tmp_path):
+    first = indexer.ingest_file(report)
+    with open(report, "a") as f:
+        f.write("\n\nAppendix: new material on pending lawsuits.")
+    second = indexer.ingest_file(report)
+    assert second.id == first.id
+    assert_indexed_once(indexer, [second.id])
+    assert "pending lawsuits" in indexer.search("pending lawsuits appendix", k=1)[0].page_content
+
+def test_reindexing_does_not_grow_the_chunk_store(report, tmp_path):
+    index_dir = tmp_path / "index"
+    indexer = DocumentIndexer(index_dir=str(index_dir))
+    blob_sizes = []
+    for n in range(6):
+        with open(report, "a") as f:
+            f.write(f"\n\nAppendix {n}: pending lawsuits.")
+        indexer.ingest_file(report)
+        indexer.save()
+        blob_sizes.append(os.path.getsize(indexer.vectorstore.docstore.path))
+        # The current blob and the one the previous generation reads
+        assert len(list(index_dir.glob("chunks*.bin"))) <= 2
+    # Deleted texts are dropped once they are half the blob, so it settles instead of growing per re-index
+    assert max(blob_sizes) <= 2 * blob_sizes[0] + 1024
+    reloaded = DocumentIndexer(index_dir=str(index_dir))
+    assert "Appendix 5" in reloaded.search("pending lawsuits appendix 5", k=1)[0].page_content
+
+def test_searches_reload_a_newer_generation_in_the_background(report, tmp_path):
+    index_dir = str(tmp_path / "index")
+    writer = DocumentIndexer(index_dir=index_dir)
+    writer.ingest_file(report)
+    writer.save()
+    reader = DocumentIndexer(index_dir=index_dir)
+    other = tmp_path / "other.txt"
+    other.write_text("Headcount grew to 120 engineers in the new office. " * 20)
+    writer.ingest_file(str(other))
+    writer.save()
+
+    # The search is answered from the generation already loaded while the new one loads
+    assert reader.search("revenue litigation", k=1)
+    reader._reloader.join()
+    assert reader.generation == writer.generation
+    assert len(reader.documents) == 2
+
+def test_refresh_notices_a_new_manifest_with_the_same_mtime(report, tmp_path):
+    index_dir = str(tmp_path / "index")
+    writer = DocumentIndexer(index_dir=index_dir)
+    writer.ingest_file(report)
+    writer.save()
+    reader = DocumentIndexer(index_dir=index_dir)
+    before = os.stat(writer.manifest_path)
+    writer.remove_document(next(iter(writer.documents)))
+    writer.save()
+    os.utime(writer.manifest_path, ns=(before.st_atime_ns, before.st_mtime_ns))
+    reader.refresh()
+    assert reader.generation == writer.generation
+    assert reader.documents == {}
+
+class LockProbeEmbeddings(MockEmbeddings):
+    """Records whether another thread could take the index lock while queries were being embedded"""
+
+    def __init__(self):
+        super().__init__()
+        self.indexer = None
+        self.lock_free_during_query = []
+
+    def embed_matrix(self, texts):
+        if self.indexer is not None and texts and texts[0].startswith("probe"):
+            acquired = []
+
+            def try_lock():
+                acquired.append(self.indexer._lock.acquire(timeout=1))
+                if acquired[0]:
+                    self.indexer._lock.release()
+
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            self.lock_free_during_query.append(acquired[0])
+        return super().embed_matrix(texts)
+
+def test_queries_are_embedded_outside_the_index_lock(report):
+    embeddings = LockProbeEmbeddings()
+    indexer = DocumentIndexer(index_dir=None, embeddings=embeddings)
+    indexer.ingest_file(report)
+    embeddings.indexer = indexer
+    indexer.search_many(["probe revenue figures", "probe headcount"], k=2)
+    assert embeddings.lock_free_during_query == [True]
+
+def test_results_are_not_cached_for_a_version_that_changed_during_the_search(indexer, report):
+    indexer.ingest_file(report)
+    search = indexer._search_many
+
+    def search_while_indexing(*args, **kwargs):
+        results = search(*args, **kwargs)
+        with indexer._lock:
+            indexer._index_changed()  # what a concurrent ingest does
+        return results
+
+    indexer._search_many = search_while_indexing
+    indexer.search("revenue figures", k=2)
+    assert indexer.retrieval_cache.stats()["entries"] == 0
+    indexer._search_many = search
+    indexer.search("revenue figures", k=2)
+    assert indexer.retrieval_cache.stats()["entries"] == 1
@@ -0,0 +1,85 @@
+import math
+
+import pytest
+
+from src.indexing.inverted_index import InvertedIndex, tokenize
+
+CHUNKS = {
+    0: "Revenue grew by ten percent, driven by subscription revenue.",
+    1: "The company faces no pending litigation.",
+    2: "Operating costs fell while revenue was flat.",
+    3: "Employees and offices across Europe and Asia."
+}
+
+def build(chunks=CHUNKS, doc_id="doc"):
+    index = InvertedIndex()
+    index.add_chunks(doc_id, chunks.items())
+    return index
+
+def bm25(index, term, chunk_id):
+    """Reference BM25 score of one term in one chunk"""
+    total_chunks = len(index.chunk_lengths)
+    average_length = index.total_length / total_chunks
+    tf = tokenize(CHUNKS[chunk_id]).count(term)
+    df = sum(term in tokenize(text) for text in CHUNKS.values())
+    idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+    length_norm = index.k1 * (1 - index.b + index.b * len(tokenize(CHUNKS[chunk_id])) / average_length)
+    return idf * tf * (index.k1 + 1) / (tf + length_norm)
+
+def test_tokenize_lowercases_and_splits_on_non_alphanumerics():
+    assert tokenize("Q3 Revenue: $1,200m (audited)") == ["q3", "revenue", "1", "200m", "audited"]
+
+def test_bm25_scores_and_ranks_by_term_frequency():
+    index = build()
+    results = index.search({"revenue": 1.0}, k=5)
+    assert [chunk_id for chunk_id, _ in results] == [0, 2]
+    for chunk_id, score in results:
+        assert score == pytest.approx(bm25(index, "revenue", chunk_id))
+
+def test_rare_terms_outweigh_common_ones():
+    index = build()
+    results = index.search({"revenue": 1.0, "litigation": 1.0}, k=1)
+    assert results[0][0] == 1
+
+def test_query_weights_scale_term_scores():
+    index = build()
+    (_, single), = index.search({"litigation": 1.0}, k=1)
+    (_, double), = index.search({"litigation": 2.0}, k=1)
+    assert double == pytest.approx(2 * single)
+
+def test_search_is_restricted_to_document_ids():
+    index = build()
+    index.add_chunks("other", [(4, "Revenue revenue revenue")])
+    assert [chunk_id for chunk_id, _ in index.search({"revenue": 1.0})][0] == 4
+    assert {chunk_id for chunk_id, _ in index.search({"revenue": 1.0}, document_ids=["doc"])} == {0, 2}
+
+def test_search_many_matches_individual_searches():
+    index = build()
+    queries = [{"revenue": 1.0}, {"litigation": 1.0, "company": 0.5}, {"missing": 1.0}]
+    assert index.search_many(queries, k=3) == [index.search(query, k=3) for query in queries]
+
+def test_remove_chunks_matches_an_index_built_without_them():
+    index = build()
+    index.remove_chunks([0, 3, 99])
+    expected = build({chunk_id: CHUNKS[chunk_id] for chunk_id in (1, 2)})
+    assert index.postings == expected.postings
+    assert index.chunk_lengths == expected.chunk_lengths
+    assert index.chunk_docs == expected.chunk_docs
+    assert index.chunk_terms == expected.chunk_terms
+    assert index.total_length == expected.total_length
+    assert "employees" not in index.postings
+
+def test_remove_all_chunks_empties_the_index():
+    index = build()
+    index.remove_chunks(list(CHUNKS))
+    assert index.postings == {} and index.total_length == 0
+    assert index.search({"revenue": 1.0}) == []
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build()
+    path = str(tmp_path / "inverted.pkl")
+    index.save(path, generation=3)
+    loaded = InvertedIndex.load(path, generation=3)
+    assert loaded.postings == index.postings and loaded.chunk_terms == index.chunk_terms
+    with pytest.raises(ValueError):
+        InvertedIndex.load(path, generation=4)
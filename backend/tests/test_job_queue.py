@@ -0,0 +1,89 @@
+import pytest
+
+from src.models import RequestStatus
+from src.workers import job_queue as job_queue_module
+from src.workers.job_queue import JobQueue
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(job_queue_module, start=1000.0)
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), visibility_timeout=30, max_attempts=3)
+
+def status(queue, request_id):
+    return queue.get_request(request_id).status
+
+def test_lease_hands_out_each_job_once_in_order(queue, clock):
+    first = queue.enqueue("index_document", {"n": 1})
+    clock.advance(1)
+    second = queue.enqueue("index_document", {"n": 2})
+    assert queue.lease("a").id == first
+    assert queue.lease("b").id == second
+    assert queue.lease("c") is None
+    assert status(queue, first) == RequestStatus.IN_PROGRESS
+
+def test_expired_lease_is_taken_over_by_another_worker(queue, clock):
+    request_id = queue.enqueue("index_document", {})
+    leased = queue.lease("a")
+    clock.advance(29)
+    assert queue.lease("b") is None
+    clock.advance(2)
+    assert queue.lease("b").id == request_id
+    # The first worker lost the job: its heartbeat, completion and failure are ignored
+    assert not queue.heartbeat(request_id, "a")
+    leased.result = {"done": True}
+    queue.complete(leased, "a")
+    queue.fail(leased, "a", "boom")
+    assert status(queue, request_id) == RequestStatus.IN_PROGRESS
+
+def test_heartbeat_keeps_the_lease_alive(queue, clock):
+    request_id = queue.enqueue("index_document", {})
+    queue.lease("a")
+    for _ in range(5):
+        clock.advance(20)
+        assert queue.heartbeat(request_id, "a")
+    assert queue.lease("b") is None
+    clock.advance(31)
+    assert queue.lease("b").id == request_id
+
+def test_failures_retry_with_exponential_backoff_then_fail(queue, clock):
+    request_id = queue.enqueue("index_document", {"file_path": "a.pdf"})
+    for attempt in (1, 2):
+        request = queue.lease("a")
+        queue.fail(request, "a", f"error {attempt}")
+        assert status(queue, request_id) == RequestStatus.PENDING
+        clock.advance(2 ** attempt - 0.5)
+        assert queue.lease("a") is None
+        clock.advance(0.5)
+    request = queue.lease("a")
+    # Retries start from the original payload
+    assert request.result == {"file_path": "a.pdf"}
+    queue.fail(request, "a", "error 3")
+    failed = queue.get_request(request_id)
+    assert failed.status == RequestStatus.FAILED and failed.error == "error 3"
+
+def test_jobs_whose_lease_expired_too_often_are_failed(queue, clock):
+    request_id = queue.enqueue("index_document", {})
+    for _ in range(3):
+        queue.lease("a")
+        clock.advance(31)
+    assert queue.lease("b") is None
+    assert status(queue, request_id) == RequestStatus.FAILED
+
+def test_complete_records_the_result(queue, clock):
+    request_id = queue.enqueue("create_project", {"name": "p"})
+    request = queue.lease("a")
+    request.result = {"project_id": "123"}
+    queue.complete(request, "a")
+    completed = queue.get_request(request_id)
+    assert completed.status == RequestStatus.COMPLETED and completed.result == {"project_id": "123"}
+
+def test_lease_skips_excluded_types(queue, clock):
+    indexing = queue.enqueue("index_document", {})
+    clock.advance(1)
+    answering = queue.enqueue("generate_all_answers", {})
+    assert queue.lease("reader", exclude_types=("index_document", "update_project")).id == answering
+    assert queue.lease("reader", exclude_types=("index_document", "update_project")) is None
+    assert queue.lease("writer").id == indexing
@@ -0,0 +1,55 @@
+import json
+import random
+
+from src.indexing.keywords import DEFAULT_KEYWORD_MAPPINGS, KeywordMatcher, QueryExpander, load_keyword_mappings
+
+def brute_force_counts(keywords, text):
+    """Occurrences of each keyword, overlapping ones included, the slow way"""
+    counts = {}
+    for keyword in set(keywords):
+        if not keyword:
+            continue
+        n = sum(text.startswith(keyword, i) for i in range(len(text)))
+        if n:
+            counts[keyword] = n
+    return counts
+
+def test_counts_overlapping_and_nested_keywords():
+    matcher = KeywordMatcher(["he", "she", "his", "hers", "aa"])
+    assert matcher.counts("ushers and aaa") == {"she": 1, "he": 1, "hers": 1, "aa": 2}
+
+def test_matches_like_substring_search():
+    matcher = KeywordMatcher(["balance sheet", "sheet", "income", "income statement", "net income"])
+    text = "the balance sheet and income statement show net income; see sheet 2"
+    assert matcher.counts(text) == brute_force_counts(
+        ["balance sheet", "sheet", "income", "income statement", "net income"], text
+    )
+
+def test_agrees_with_brute_force_on_random_text():
+    rng = random.Random(7)
+    alphabet = "abc "
+    for _ in range(200):
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert KeywordMatcher(keywords).counts(text) == brute_force_counts(keywords, text)
+
+def test_empty_keywords_and_text():
+    assert KeywordMatcher([]).counts("anything") == {}
+    assert KeywordMatcher(["", "a"]).counts("") == {}
+
+def test_expand_returns_keywords_of_every_matched_pattern():
+    expander = QueryExpander(DEFAULT_KEYWORD_MAPPINGS)
+    keywords = expander.expand("What is the Company Name and its REVENUE?")
+    assert keywords == set(DEFAULT_KEYWORD_MAPPINGS["company name"]) | set(DEFAULT_KEYWORD_MAPPINGS["revenue"])
+    assert expander.expand("Describe the office layout") == set()
+
+def test_expander_lowercases_custom_mappings():
+    expander = QueryExpander({"Head Count": ["Employees", "FTE"]})
+    assert expander.expand("total head count?") == {"employees", "fte"}
+
+def test_load_keyword_mappings_from_file_and_fallback(tmp_path):
+    path = tmp_path / "mappings.json"
+    path.write_text(json.dumps({"churn": ["attrition"]}))
+    assert load_keyword_mappings(str(path)) == {"churn": ["attrition"]}
+    assert load_keyword_mappings("") == DEFAULT_KEYWORD_MAPPINGS
+    assert load_keyword_mappings(str(tmp_path / "missing.json")) == DEFAULT_KEYWORD_MAPPINGS
@@ -0,0 +1,35 @@
+import sys
+import threading
+
+import pytest
+
+from src.utils.lazy import lazy_import
+
+def test_first_use_from_many_threads_sees_the_whole_module(tmp_path, monkeypatch):
+    # Slow to execute, so every thread reaches the module while it is still loading
+    (tmp_path / "slow_module.py").write_text("import time\ntime.sleep(0.2)\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_module", raising=False)
+    module = lazy_import("slow_module")
+    assert "slow_module" not in sys.modules
+    start = threading.Barrier(16)
+    values, errors = [], []
+
+    def use():
+        start.wait()
+        try:
+            values.append(module.VALUE)
+        except AttributeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=use) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert values == [42] * 16
+
+def test_missing_module_fails_at_import():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("no_such_module_here")
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services import rate_limiter as rate_limiter_module
+from src.services.rate_limiter import AdaptiveRateLimiter, TokenBucket
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(rate_limiter_module, start=100.0)
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    assert bucket.wait_time(2, clock.now) == 0
+    bucket.consume(2)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(1.0)
+    clock.advance(0.5)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(0.5)
+    clock.advance(10)
+    bucket.wait_time(1, clock.now)
+    assert bucket.tokens == 2
+
+def test_token_bucket_with_zero_rate_is_unlimited(clock):
+    bucket = TokenBucket(rate_per_minute=0)
+    bucket.consume(1000)
+    assert bucket.wait_time(1000, clock.now) == 0
+
+def test_requests_larger_than_the_bucket_wait_for_a_full_bucket(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=5)
+    bucket.consume(5)
+    assert bucket.wait_time(100, clock.now) == pytest.approx(5.0)
+
+def test_concurrency_limit_caps_in_flight_calls(clock):
+    limiter = AdaptiveRateLimiter("test", max_concurrency=2)
+    assert limiter._try_acquire(0) == 0
+    assert limiter._try_acquire(0) == 0
+    assert limiter._try_acquire(0) > 0
+    limiter.release()
+    assert limiter._try_acquire(0) == 0
+    assert limiter.in_flight == 2
+
+def test_success_increases_the_limit_additively_up_to_the_maximum(clock):
+    limiter = AdaptiveRateLimiter("test", max_concurrency=4, initial_concurrency=2)
+    limiter.on_success()
+    assert limiter.limit == pytest.approx(2.5)
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 4
+
+def test_rate_limit_halves_the_limit_and_pauses_everyone(clock):
+    limiter = AdaptiveRateLimiter("test", max_concurrency=8)
+    limiter.on_rate_limited(retry_after=3)
+    assert limiter.limit == 4
+    assert limiter._try_acquire(0) == pytest.approx(3)
+    # Further 429s during the pause are the same congestion event
+    limiter.on_rate_limited(retry_after=3)
+    assert limiter.limit == 4
+    clock.advance(3)
+    assert limiter._try_acquire(0) == 0
+    limiter.on_rate_limited()
+    assert limiter.limit == 2
+    assert limiter.stats()["paused_for"] == pytest.approx(5.0)
+
+def test_limit_never_drops_below_one(clock):
+    limiter = AdaptiveRateLimiter("test", max_concurrency=2)
+    for _ in range(5):
+        limiter.on_rate_limited(retry_after=1)
+        clock.advance(1)
+    assert limiter.limit == 1
+
+def test_requests_per_minute_are_enforced(clock):
+    limiter = AdaptiveRateLimiter("test", requests_per_minute=60, max_concurrency=8)
+    assert limiter._try_acquire(0) == 0
+    limiter.release()
+    assert limiter._try_acquire(0) == pytest.approx(1.0)
+    clock.advance(1)
+    assert limiter._try_acquire(0) == 0
+
+def test_acquire_waits_asynchronously_for_a_free_slot():
+    limiter = AdaptiveRateLimiter("test", max_concurrency=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 1
+
+class CountingLimiter(AdaptiveRateLimiter):
+    """Counts how often waiters check for a slot"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checks = 0
+
+    def _reserve(self, estimated_tokens):
+        self.checks += 1
+        return super()._reserve(estimated_tokens)
+
+def test_acquire_sync_sleeps_until_a_slot_is_released():
+    limiter = CountingLimiter("test", max_concurrency=1)
+    limiter.acquire_sync()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire_sync(), acquired.set()), daemon=True)
+    waiter.start()
+    time.sleep(0.3)
+    # One failed check, not one every few milliseconds
+    assert not acquired.is_set() and limiter.checks == 2
+    limiter.release()
+    assert acquired.wait(1)
+    waiter.join()
+    assert limiter.in_flight == 1
+
+def test_release_from_another_thread_wakes_an_async_waiter():
+    limiter = CountingLimiter("test", max_concurrency=1)
+
+    async def scenario():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.3)
+        assert not waiter.done() and limiter.checks == 2
+        threading.Thread(target=limiter.release).start()
+        await asyncio.wait_for(waiter, 1)
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.models import EvaluationResult, GroundTruthAnswer, Project, ProjectStatus
+from src.storage.memory import InMemoryStorage
+from src.storage.sqlite import SQLiteStorage
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStorage()
+    return SQLiteStorage(str(tmp_path / "storage.sqlite"))
+
+def project(project_id, documents=()):
+    return Project(id=project_id, name=project_id, status=ProjectStatus.READY, scope="ALL_DOCS",
+                   questions=[], answers=[], documents=list(documents))
+
+def ground_truth(ground_truth_id, question_id, text="answer"):
+    return GroundTruthAnswer(id=ground_truth_id, question_id=question_id, answer_text=text, source="human_expert")
+
+def evaluation(evaluation_id, project_id):
+    return EvaluationResult(
+        id=evaluation_id, project_id=project_id, question_id="q", ai_answer="a", ground_truth_answer="g",
+        accuracy_score=1.0, citation_quality_score=1.0, confidence_correlation_score=1.0, overall_score=1.0,
+        evaluation_details={}
+    )
+
+def ids(records):
+    return [record.id for record in records]
+
+def test_ground_truth_is_looked_up_by_question(storage):
+    storage.save_ground_truth_answer(ground_truth("g1", "q1", "first"))
+    storage.save_ground_truth_answer(ground_truth("g2", "q2"))
+    storage.save_ground_truth_answer(ground_truth("g3", "q1", "second"))
+    assert storage.get_ground_truth_answer("q1").id == "g1"
+    assert storage.get_ground_truth_answer("q3") is None
+    storage.delete_ground_truth_answer("g1")
+    assert storage.get_ground_truth_answer("q1").id == "g3"
+
+def test_ground_truth_moves_with_its_question(storage):
+    storage.save_ground_truth_answer(ground_truth("g1", "q1"))
+    storage.save_ground_truth_answer(ground_truth("g1", "q2"))
+    assert storage.get_ground_truth_answer("q1") is None
+    assert storage.get_ground_truth_answer("q2").id == "g1"
+
+def test_evaluations_are_listed_by_project(storage):
+    storage.save_evaluation_result(evaluation("e1", "p1"))
+    storage.save_evaluation_result(evaluation("e2", "p2"))
+    storage.save_evaluation_result(evaluation("e3", "p1"))
+    assert ids(storage.list_evaluation_results("p1")) == ["e1", "e3"]
+    assert ids(storage.list_evaluation_results()) == ["e1", "e2", "e3"]
+    storage.save_evaluation_result(evaluation("e3", "p2"))
+    storage.delete_evaluation_result("e1")
+    assert ids(storage.list_evaluation_results("p1")) == []
+    assert ids(storage.list_evaluation_results("p2")) == ["e2", "e3"]
+
+def test_projects_are_listed_by_document(storage):
+    storage.save_project(project("p1", ["d1", "d2"]))
+    storage.save_project(project("p2", ["d2"]))
+    assert ids(storage.list_projects_for_document("d2")) == ["p1", "p2"]
+    assert ids(storage.list_projects_for_document("d3")) == []
+    storage.save_project(project("p1", ["d3"]))
+    assert ids(storage.list_projects_for_document("d1")) == []
+    assert ids(storage.list_projects_for_document("d2")) == ["p2"]
+    assert ids(storage.list_projects_for_document("d3")) == ["p1"]
+    storage.delete_project("p2")
+    assert ids(storage.list_projects_for_document("d2")) == []
+
+def test_update_project_applies_to_the_stored_project(storage):
+    storage.save_project(project("p1"))
+    updated = storage.update_project("p1", lambda saved: saved.documents.append("d1"))
+    assert updated.documents == ["d1"]
+    assert storage.get_project("p1").documents == ["d1"]
+    assert ids(storage.list_projects_for_document("d1")) == ["p1"]
+    assert storage.update_project("missing", lambda saved: saved.documents.append("d1")) is None
+    assert storage.get_project("missing") is None
+
+def test_concurrent_updates_from_two_processes_are_not_lost(tmp_path):
+    # Separate connections to one file stand in for the API and job worker processes
+    path = str(tmp_path / "storage.sqlite")
+    writers = [SQLiteStorage(path), SQLiteStorage(path)]
+    writers[0].save_project(project("p1"))
+
+    def add_documents(storage, prefix):
+        for i in range(25):
+            storage.update_project("p1", lambda saved: saved.documents.append(f"{prefix}{i}"))
+
+    threads = [threading.Thread(target=add_documents, args=(storage, f"w{n}-")) for n, storage in enumerate(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(SQLiteStorage(path).get_project("p1").documents) == 50
+
+def test_sqlite_backfills_document_links_of_existing_projects(tmp_path):
+    path = str(tmp_path / "storage.sqlite")
+    SQLiteStorage(path).save_project(project("p1", ["d1"]))
+    db = sqlite3.connect(path)
+    db.execute("DROP TABLE project_documents")
+    db.commit()
+    db.close()
+    assert ids(SQLiteStorage(path).list_projects_for_document("d1")) == ["p1"]